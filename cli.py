@@ -8,10 +8,14 @@ Usage:
     python cli.py export <session_id> --output results.csv
 """
 import argparse
+import csv
 import json
 import sys
 from datetime import datetime
 
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+
 from database import Database
 from database.models import ScanSession, DuplicateGroup, FileEntry
 from core import DuplicateScanner
@@ -50,14 +54,17 @@ def cmd_scan(args):
         print(f"Valid types: {', '.join(valid_types)}")
         sys.exit(1)
 
-    # Create scan session
     paths = args.paths if isinstance(args.paths, list) else [args.paths]
     session_name = f"CLI Scan {datetime.now().strftime('%Y-%m-%d %H:%M')}"
-    session_id = db.create_scan_session(
-        session_name,
-        json.dumps(file_types),
-        args.threshold
-    )
+    # Create the scan session and mark it running in one transaction
+    with db.session_scope() as session:
+        session_id = db.create_scan_session(
+            session_name,
+            json.dumps(file_types),
+            args.threshold,
+            session=session
+        )
+        db.update_session_status(session_id, 'running', session)
 
     print(f"Starting scan session {session_id}")
     print(f"Paths: {', '.join(paths)}")
@@ -72,8 +79,6 @@ def cmd_scan(args):
     )
 
     # Run scan
-    db.update_session_status(session_id, 'running')
-
     path_tuples = [(p, args.recursive) for p in paths]
     scanner.scan_paths(
         path_tuples,
@@ -90,13 +95,18 @@ def cmd_scan(args):
 
     session = db.get_session()
     try:
-        groups = session.query(DuplicateGroup).filter_by(session_id=session_id).all()
-        total_files = 0
-        for group in groups:
-            total_files += len(group.files)
+        # Count in SQL instead of lazy-loading every group's files (N+1 queries)
+        group_count = session.query(func.count(DuplicateGroup.id)).filter(
+            DuplicateGroup.session_id == session_id
+        ).scalar()
+        total_files = session.query(func.count(FileEntry.id)).join(
+            DuplicateGroup
+        ).filter(
+            DuplicateGroup.session_id == session_id
+        ).scalar()
 
         print(f"Session ID: {session_id}")
-        print(f"Duplicate groups found: {len(groups)}")
+        print(f"Duplicate groups found: {group_count}")
         print(f"Total duplicate files: {total_files}")
         print()
         print(f"Use 'python cli.py list {session_id}' to view details")
@@ -124,7 +134,10 @@ def cmd_list(args):
             print(f"Threshold: {scan_session.similarity_threshold * 100}%")
             print()
 
-            groups = session.query(DuplicateGroup).filter_by(session_id=args.session_id).all()
+            # Use eager loading to avoid N+1 query pattern
+            groups = session.query(DuplicateGroup).options(
+                joinedload(DuplicateGroup.files)
+            ).filter_by(session_id=args.session_id).all()
 
             for i, group in enumerate(groups, 1):
                 print(f"\nGroup {i} ({group.file_type}, {group.similarity_score*100:.1f}% similar):")
@@ -161,18 +174,28 @@ def cmd_export(args):
             print(f"Session {args.session_id} not found")
             sys.exit(1)
 
-        groups = session.query(DuplicateGroup).filter_by(session_id=args.session_id).all()
-
-        with open(args.output, 'w') as f:
-            # CSV header
-            f.write("group_id,file_type,similarity,file_path,file_size_bytes,modified_time\n")
-
-            for group in groups:
-                for file_entry in group.files:
-                    modified = file_entry.modified_time.isoformat() if file_entry.modified_time else ''
-                    # Escape commas and quotes in file path
-                    path = file_entry.file_path.replace('"', '""')
-                    f.write(f'{group.id},{group.file_type},{group.similarity_score},"{path}",{file_entry.file_size},{modified}\n')
+        # Use eager loading to avoid N+1 query pattern
+        groups = session.query(DuplicateGroup).options(
+            joinedload(DuplicateGroup.files)
+        ).filter_by(session_id=args.session_id).all()
+
+        with open(args.output, 'w', newline='', buffering=1024 * 1024) as f:
+            # csv.writer handles quoting of commas, quotes and newlines in paths
+            writer = csv.writer(f)
+            writer.writerow(['group_id', 'file_type', 'similarity', 'file_path',
+                             'file_size_bytes', 'modified_time'])
+            writer.writerows(
+                (
+                    group.id,
+                    group.file_type,
+                    group.similarity_score,
+                    file_entry.file_path,
+                    file_entry.file_size,
+                    file_entry.modified_time.isoformat() if file_entry.modified_time else ''
+                )
+                for group in groups
+                for file_entry in group.files
+            )
 
         total_files = sum(len(g.files) for g in groups)
         print(f"Exported {len(groups)} groups ({total_files} files) to {args.output}")
@@ -203,8 +226,8 @@ Examples:
                             help='File types to scan (image, document, video, archive, code)')
     scan_parser.add_argument('--threshold', '-s', type=float, default=0.95,
                             help='Similarity threshold (0.0-1.0, default 0.95)')
-    scan_parser.add_argument('--threads', type=int, default=4,
-                            help='Number of threads (default 4)')
+    scan_parser.add_argument('--threads', type=int, default=DuplicateScanner.DEFAULT_THREAD_COUNT,
+                            help='Number of hashing threads (default: CPU count, at most 8)')
     scan_parser.add_argument('--recursive', '-r', action='store_true', default=True,
                             help='Include subdirectories (default: True)')
     scan_parser.add_argument('--no-recursive', action='store_false', dest='recursive',
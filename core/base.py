@@ -3,23 +3,169 @@ Base classes and utilities for file detection and duplicate finding.
 """
 import os
 import hashlib
+import mmap
+import threading
+import functools
 from pathlib import Path
 from abc import ABC, abstractmethod
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterable, Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
 from datetime import datetime
 import mimetypes
+import numpy as np
+
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+# Files at least this large are hashed through mmap instead of read() calls
+MMAP_MIN_SIZE = 1024 * 1024
+
+
+def _new_hash(algorithm: str):
+    """Hash object for a hashlib algorithm name or 'xxh3_128'"""
+    if algorithm == 'xxh3_128':
+        return xxhash.xxh3_128()
+    return hashlib.new(algorithm)
+
+
+def _madvise(mm: mmap.mmap, advice_name: str):
+    """Apply an madvise hint if the platform supports it"""
+    advice = getattr(mmap, advice_name, None)
+    if advice is not None:
+        try:
+            mm.madvise(advice)
+        except OSError:
+            pass
+
+
+def read_text_file(file_path: str) -> str:
+    """Read a text file with a single read.
+
+    Decodes as UTF-8 and falls back to latin-1, which accepts any byte
+    sequence, instead of re-reading the file once per candidate encoding.
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
+def simhash(tokens: Iterable[str]) -> int:
+    """Compute a 64-bit SimHash over a token stream.
+
+    Each distinct token contributes its 64-bit hash weighted by frequency, so
+    texts sharing most of their tokens end up a small Hamming distance apart.
+    Token order is ignored, matching the token-based fuzzy ratios.
+    """
+    counts = Counter(tokens)
+    if not counts:
+        return 0
+
+    # blake2b keeps hashes stable across processes (unlike built-in hash())
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+         for token in counts),
+        dtype=np.uint64, count=len(counts)
+    )
+    weights = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+
+    # bits[i, j] is bit (63 - j) of token i's hash, most significant first
+    shifts = np.arange(63, -1, -1, dtype=np.uint64)
+    bits = ((hashes[:, None] >> shifts) & np.uint64(1)).astype(bool)
+    totals = np.where(bits, weights[:, None], -weights[:, None]).sum(axis=0)
+
+    value = 0
+    for bit in totals > 0:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def simhash_similarity(hash1: int, hash2: int) -> float:
+    """Similarity (0.0-1.0) of two 64-bit SimHashes from their Hamming distance"""
+    return 1.0 - (hash1 ^ hash2).bit_count() / 64.0
+
+
+def text_signature(text: str) -> str:
+    """Build a "<simhash>|<sha256>" signature for normalized text.
+
+    The 64-bit SimHash (hex) leads so that signature-prefix grouping buckets
+    near-duplicates together; the SHA256 identifies exact copies.
+    """
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return f"{simhash(text.split()):016x}|{digest}"
+
+
+def compare_text_signatures(sig1: str, sig2: str) -> float:
+    """Compare two text_signature() values and return similarity (0.0-1.0)"""
+    if sig1 == sig2:
+        return 1.0
+    # Fixed layout: 16 hex SimHash digits, '|', then the SHA256 hex digest
+    if len(sig1) != 81 or len(sig2) != 81 or sig1[16] != '|' or sig2[16] != '|':
+        return 0.0
+    # Same SHA256 means identical normalized content
+    if sig1[17:] == sig2[17:]:
+        return 1.0
+    try:
+        return simhash_similarity(int(sig1[:16], 16), int(sig2[:16], 16))
+    except ValueError:
+        return 0.0
+
+
+def text_signatures_match(sig1: str, sig2: str, max_distance: int) -> bool:
+    """True if two text_signature() values are identical in content or their
+    SimHashes are at most max_distance bits apart"""
+    if sig1 == sig2:
+        return True
+    if len(sig1) != 81 or len(sig2) != 81 or sig1[16] != '|' or sig2[16] != '|':
+        return False
+    if sig1[17:] == sig2[17:]:
+        return True
+    try:
+        return (int(sig1[:16], 16) ^ int(sig2[:16], 16)).bit_count() <= max_distance
+    except ValueError:
+        return False
+
+
+@functools.lru_cache(maxsize=256)
+def _guess_mime_type(ext: str) -> Optional[str]:
+    """Guess a MIME type from a file extension (memoized per extension)"""
+    return mimetypes.guess_type(f"file{ext}")[0]
 
 
 class FileInfo:
     """Container for file information"""
-    def __init__(self, path: str):
+    def __init__(self, path: str, stat_result: Optional[os.stat_result] = None):
+        """
+        Args:
+            path: File path
+            stat_result: Optional pre-fetched stat (e.g. from os.DirEntry.stat())
+                to avoid extra stat syscalls
+        """
         self.path = path
-        self.size = os.path.getsize(path)
+        st = stat_result if stat_result is not None else os.stat(path)
+        self.size = st.st_size
+        self.mtime = st.st_mtime
         # Convert Unix timestamp to datetime object for SQLAlchemy
-        self.modified = datetime.fromtimestamp(os.path.getmtime(path))
+        self.modified = datetime.fromtimestamp(st.st_mtime)
         self.name = os.path.basename(path)
         self.ext = os.path.splitext(path)[1].lower()
-        self.mime_type = mimetypes.guess_type(path)[0]
+
+    @property
+    def mime_type(self) -> Optional[str]:
+        """MIME type guessed from the extension, computed only when needed"""
+        return _guess_mime_type(self.ext)
     
     def __repr__(self):
         return f"FileInfo({self.path})"
@@ -46,23 +192,131 @@ class BaseDetector(ABC):
         Default implementation returns 1.0 for exact match, 0.0 otherwise.
         Subclasses should override for fuzzy matching."""
         return 1.0 if sig1 == sig2 else 0.0
+
+    def signatures_match(self, sig1: str, sig2: str) -> bool:
+        """True if two signatures are similar enough to be duplicates.
+        Hamming-based detectors override this to compare raw bit distances
+        against a precomputed limit instead of a float similarity."""
+        return self.compare_signatures(sig1, sig2) >= self.similarity_threshold
+
+    def max_hamming_distance(self, bits: int) -> int:
+        """Largest distance over `bits` bits that still meets the threshold
+        (similarity = 1 - distance / bits)"""
+        # Start from the real-valued bound, then settle rounding at the edge
+        # with the exact float test compare_signatures() applies
+        distance = int(bits * (1.0 - self.similarity_threshold))
+        while distance < bits and 1.0 - (distance + 1) / bits >= self.similarity_threshold:
+            distance += 1
+        while distance >= 0 and 1.0 - distance / bits < self.similarity_threshold:
+            distance -= 1
+        return distance
+
+    def compute_signatures_threaded(self, paths: List[str], max_workers: Optional[int] = None,
+                                    progress_callback: Optional[Callable] = None,
+                                    should_stop: Optional[Callable] = None,
+                                    signature_fn: Optional[Callable] = None) -> Dict[str, str]:
+        """Run compute_signature over many files on a thread pool.
+
+        Only worthwhile for detectors whose work happens in C code that
+        releases the GIL (hashlib, OpenCV decoding, ...).
+
+        Args:
+            paths: File paths to process
+            max_workers: Pool size (defaults to os.cpu_count())
+            progress_callback: Optional callback(completed, total)
+            should_stop: Optional callable; returning True cancels pending work
+            signature_fn: Optional callable(path) used instead of compute_signature
+
+        Returns:
+            Dict mapping path to signature (failed files are omitted)
+        """
+        signature_fn = signature_fn or self.compute_signature
+        signatures = {}
+        total = len(paths)
+        executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count())
+        try:
+            futures = {executor.submit(signature_fn, path): path for path in paths}
+            for idx, future in enumerate(as_completed(futures), 1):
+                sig = future.result()
+                if sig:
+                    signatures[futures[future]] = sig
+                if progress_callback:
+                    progress_callback(idx, total)
+                if should_stop and should_stop():
+                    break
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return signatures
+
+    def worker_kwargs(self) -> Dict:
+        """Constructor arguments needed to rebuild this detector in a worker process"""
+        return {'similarity_threshold': self.similarity_threshold}
+
+    def signature_cache_key(self) -> str:
+        """Identifies which cached signatures this detector can reuse.
+
+        Subclasses whose signatures depend on parameters must include them.
+        """
+        return type(self).__name__
     
     @staticmethod
     def file_hash(file_path: str, algorithm='sha256') -> str:
-        """Compute file hash"""
-        hash_func = hashlib.new(algorithm)
+        """Compute file hash.
+
+        Pass algorithm='blake3' to use BLAKE3 (requires the blake3 package)
+        or 'xxh3_128' for XXH3 (requires the xxhash package).
+        """
+        if algorithm == 'blake3':
+            # Memory-maps the file and hashes it with SIMD across all cores
+            hash_func = blake3(max_threads=blake3.AUTO)
+            hash_func.update_mmap(file_path)
+            return hash_func.hexdigest()
+
         with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(8192), b''):
+            if os.fstat(f.fileno()).st_size >= MMAP_MIN_SIZE:
+                # Let the kernel read ahead; the hash consumes pages directly
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    _madvise(mm, 'MADV_SEQUENTIAL')
+                    hash_func = _new_hash(algorithm)
+                    hash_func.update(mm)
+                    return hash_func.hexdigest()
+
+            if hasattr(hashlib, 'file_digest') and algorithm != 'xxh3_128':
+                # Python 3.11+: reads into one reused buffer instead of a new
+                # bytes object per chunk. The loop itself is Python; only the
+                # digest update releases the GIL (as in the loop below).
+                return hashlib.file_digest(f, algorithm).hexdigest()
+
+            hash_func = _new_hash(algorithm)
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
                 hash_func.update(chunk)
         return hash_func.hexdigest()
     
     @staticmethod
-    def quick_hash(file_path: str, sample_size: int = 8192) -> str:
-        """Quick hash using file start/middle/end"""
+    def quick_hash(file_path: str, sample_size: int = 8192, use_md5: bool = False) -> str:
+        """Quick hash using file start/middle/end.
+
+        Uses non-cryptographic xxh3_64 when the xxhash package is installed;
+        pass use_md5=True for the previous MD5 digest format.
+        """
         file_size = os.path.getsize(file_path)
-        hash_func = hashlib.md5()
+        if XXHASH_AVAILABLE and not use_md5:
+            hash_func = xxhash.xxh3_64()
+        else:
+            hash_func = hashlib.md5()
         
         with open(file_path, 'rb') as f:
+            if file_size >= MMAP_MIN_SIZE:
+                # Hash zero-copy slices of the mapping instead of seek+read
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    _madvise(mm, 'MADV_RANDOM')
+                    with memoryview(mm) as view:
+                        hash_func.update(view[:sample_size])
+                        middle = file_size // 2
+                        hash_func.update(view[middle:middle + sample_size])
+                        hash_func.update(view[-sample_size:])
+                return hash_func.hexdigest()
+
             # Start
             hash_func.update(f.read(sample_size))
             
@@ -95,15 +349,26 @@ class FileScanner:
         '.venv', 'dist', 'build', '.cache', '.pytest_cache', '.mypy_cache'
     }
     
-    def __init__(self, file_types: List[str] = None):
+    # Files stat()ed per thread-pool task during discovery
+    STAT_CHUNK_SIZE = 256
+    
+    def __init__(self, file_types: List[str] = None, stat_workers: int = 8):
         """
         Args:
             file_types: List of file types to scan for (e.g., ['image', 'document'])
+            stat_workers: Threads issuing scandir() and stat() calls during discovery
+                (1 disables the pool)
         """
         self.file_types = file_types or list(self.SUPPORTED_EXTENSIONS.keys())
+        self.stat_workers = stat_workers
         self.extensions = set()
         for ft in self.file_types:
             self.extensions.update(self.SUPPORTED_EXTENSIONS.get(ft, set()))
+        # Reverse index so categorizing a file is one dict lookup
+        self.category_by_ext: Dict[str, str] = {}
+        for category, extensions in self.SUPPORTED_EXTENSIONS.items():
+            for ext in extensions:
+                self.category_by_ext.setdefault(ext, category)
     
     def scan_directory(self, path: str, include_subdirs: bool = True, 
                       progress_callback=None) -> List[FileInfo]:
@@ -118,48 +383,130 @@ class FileScanner:
         Returns:
             List of FileInfo objects
         """
+        # The walk itself needs no stat() calls (d_type tells files from
+        # directories), so collect candidates first and stat them in batches
+        entries = [
+            entry for entry in self._iter_files(path, include_subdirs)
+            if os.path.splitext(entry.name)[1].lower() in self.extensions
+        ]
+
         files = []
-        total = 0
-        
-        if include_subdirs:
-            for root, dirs, filenames in os.walk(path):
-                # Exclude certain directories
-                dirs[:] = [d for d in dirs if d not in self.EXCLUDE_DIRS]
-                
-                for filename in filenames:
-                    ext = os.path.splitext(filename)[1].lower()
-                    if ext in self.extensions:
-                        file_path = os.path.join(root, filename)
-                        try:
-                            files.append(FileInfo(file_path))
-                            total += 1
-                            if progress_callback:
-                                progress_callback(file_path, total)
-                        except (OSError, PermissionError):
-                            continue
-        else:
-            try:
-                for item in os.listdir(path):
-                    item_path = os.path.join(path, item)
-                    if os.path.isfile(item_path):
-                        ext = os.path.splitext(item)[1].lower()
-                        if ext in self.extensions:
-                            try:
-                                files.append(FileInfo(item_path))
-                                total += 1
-                                if progress_callback:
-                                    progress_callback(item_path, total)
-                            except (OSError, PermissionError):
-                                continue
-            except (OSError, PermissionError):
-                pass
+        for entry, stat_result in zip(entries, self._stat_entries(entries)):
+            if stat_result is None:
+                continue
+            files.append(FileInfo(entry.path, stat_result))
+            if progress_callback:
+                progress_callback(entry.path, len(files))
         
         return files
+
+    def _stat_entries(self, entries: List[os.DirEntry]) -> Iterable[Optional[os.stat_result]]:
+        """Yield each entry's stat result (None if it failed), in order.
+
+        os.stat releases the GIL, so chunks run on a thread pool to keep many
+        lookups in flight; this matters most on network and cold filesystems.
+        """
+        def stat_chunk(chunk):
+            results = []
+            for entry in chunk:
+                try:
+                    results.append(entry.stat())
+                except OSError:
+                    results.append(None)
+            return results
+
+        chunks = [entries[i:i + self.STAT_CHUNK_SIZE]
+                  for i in range(0, len(entries), self.STAT_CHUNK_SIZE)]
+        if self.stat_workers <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                yield from stat_chunk(chunk)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.stat_workers) as executor:
+            for results in executor.map(stat_chunk, chunks):
+                yield from results
+
+    def _iter_files(self, path: str, include_subdirs: bool):
+        """Yield os.DirEntry objects for regular files under path.
+
+        Walks depth-first in the same order as os.walk, without following
+        symlinks and skipping EXCLUDE_DIRS. scandir releases the GIL, so
+        with stat_workers > 1 subdirectories are listed ahead on a thread
+        pool while entries are still yielded in walk order.
+        """
+        if self.stat_workers <= 1 or not include_subdirs:
+            stack = [path]
+            while stack:
+                files, subdirs = self._list_dir(stack.pop(), include_subdirs)
+                yield from files
+                stack.extend(reversed(subdirs))
+            return
+
+        executor = ThreadPoolExecutor(max_workers=self.stat_workers)
+        try:
+            stack = [executor.submit(self._list_dir, path, True)]
+            while stack:
+                files, subdirs = stack.pop().result()
+                yield from files
+                # Submitted in walk order so the next directory is listed first
+                futures = [executor.submit(self._list_dir, subdir, True) for subdir in subdirs]
+                stack.extend(reversed(futures))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _list_dir(self, path: str, include_subdirs: bool) -> Tuple[List[os.DirEntry], List[str]]:
+        """One directory's regular files and the subdirectories to descend into"""
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        # Symlinked files would show up as duplicates of
+                        # their own targets
+                        if entry.is_file(follow_symlinks=False):
+                            files.append(entry)
+                        elif include_subdirs and entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.EXCLUDE_DIRS:
+                                subdirs.append(entry.path)
+                    except OSError:
+                        continue
+        except (OSError, PermissionError):
+            pass
+        return files, subdirs
+
+    @staticmethod
+    def prefetch(files: List[FileInfo], max_bytes: int = 512 * 1024 * 1024):
+        """Ask the kernel to start reading files that are about to be hashed.
+
+        Runs posix_fadvise(WILLNEED) in a background thread so readahead
+        overlaps with Python work. Stops after max_bytes to avoid evicting
+        the page cache on huge scans. No-op where posix_fadvise is missing.
+        """
+        if not hasattr(os, 'posix_fadvise'):
+            return None
+
+        def advise():
+            remaining = max_bytes
+            for file_info in files:
+                if file_info.size > remaining:
+                    break
+                try:
+                    fd = os.open(file_info.path, os.O_RDONLY)
+                except OSError:
+                    continue
+                try:
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                    remaining -= file_info.size
+                except OSError:
+                    pass
+                finally:
+                    os.close(fd)
+
+        thread = threading.Thread(target=advise, daemon=True)
+        thread.start()
+        return thread
     
     def get_file_category(self, file_path: str) -> Optional[str]:
         """Determine which category a file belongs to"""
-        ext = os.path.splitext(file_path)[1].lower()
-        for category, extensions in self.SUPPORTED_EXTENSIONS.items():
-            if ext in extensions:
-                return category
-        return None
+        return self.category_by_ext.get(os.path.splitext(file_path)[1].lower())
@@ -0,0 +1,57 @@
+"""
+BK-tree index for Hamming-distance range queries over integer hashes.
+"""
+from typing import Any, List, Tuple
+
+
+class BKTree:
+    """Burkhard-Keller tree over integer hashes using Hamming distance.
+
+    Each child edge is labelled with its distance to the parent. A range query
+    at distance d from a node only descends into children whose edge label lies
+    within [d - radius, d + radius] (triangle inequality), so far-away subtrees
+    are never visited.
+    """
+
+    def __init__(self):
+        # Nodes are [key, value, {edge_distance: child}] lists for speed
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, key: int, value: Any):
+        """Insert a hash with an associated value"""
+        self._size += 1
+        if self._root is None:
+            self._root = [key, value, {}]
+            return
+
+        node = self._root
+        while True:
+            distance = (key ^ node[0]).bit_count()
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, value, {}]
+                return
+            node = child
+
+    def query(self, key: int, radius: int) -> List[Tuple[Any, int]]:
+        """Return (value, distance) for every stored hash within radius of key"""
+        if self._root is None:
+            return []
+
+        results = []
+        stack = [self._root]
+        while stack:
+            node_key, value, children = stack.pop()
+            distance = (key ^ node_key).bit_count()
+            if distance <= radius:
+                results.append((value, distance))
+            low = distance - radius
+            high = distance + radius
+            for edge, child in children.items():
+                if low <= edge <= high:
+                    stack.append(child)
+        return results
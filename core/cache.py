@@ -0,0 +1,61 @@
+"""
+Bounded in-memory caches shared by the detectors.
+"""
+import threading
+from typing import Optional
+from collections import OrderedDict
+
+
+class BoundedCache:
+    """A simple bounded LRU-style cache using OrderedDict.
+
+    Bounded by entry count and, optionally, by the total length of str/bytes
+    values so a few huge documents cannot blow up memory. Safe to share
+    between threads.
+    """
+
+    def __init__(self, maxsize: int = 1000, max_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._bytes = 0
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sizeof(value) -> int:
+        return len(value) if isinstance(value, (str, bytes)) else 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._cache:
+                # Move to end (most recently used)
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._set(key, value)
+
+    def _set(self, key, value):
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # Too large to cache at all; drop any stale value for the key
+            if key in self._cache:
+                self._bytes -= self._sizeof(self._cache.pop(key))
+            return
+
+        if key in self._cache:
+            self._bytes -= self._sizeof(self._cache[key])
+            self._cache.move_to_end(key)
+        self._cache[key] = value
+        self._bytes += size
+
+        # Remove oldest items until both limits hold
+        while len(self._cache) > self.maxsize or (
+                self.max_bytes is not None and self._bytes > self.max_bytes):
+            _, evicted = self._cache.popitem(last=False)
+            self._bytes -= self._sizeof(evicted)
+
+    def __contains__(self, key):
+        return key in self._cache
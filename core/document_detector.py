@@ -2,38 +2,12 @@
 Document duplicate detector using text extraction and comparison.
 """
 import os
-from typing import Optional
-from collections import OrderedDict
-import hashlib
-from rapidfuzz import fuzz
-from .base import BaseDetector
-
-
-class BoundedCache:
-    """A simple bounded LRU-style cache using OrderedDict"""
-
-    def __init__(self, maxsize: int = 1000):
-        self.maxsize = maxsize
-        self._cache: OrderedDict = OrderedDict()
-
-    def get(self, key):
-        if key in self._cache:
-            # Move to end (most recently used)
-            self._cache.move_to_end(key)
-            return self._cache[key]
-        return None
-
-    def set(self, key, value):
-        if key in self._cache:
-            self._cache.move_to_end(key)
-        else:
-            if len(self._cache) >= self.maxsize:
-                # Remove oldest item
-                self._cache.popitem(last=False)
-        self._cache[key] = value
-
-    def __contains__(self, key):
-        return key in self._cache
+import threading
+from typing import Optional, List
+import numpy as np
+from rapidfuzz import fuzz, process
+from .base import BaseDetector, text_signature, compare_text_signatures, text_signatures_match, read_text_file
+from .cache import BoundedCache
 
 try:
     import docx
@@ -48,6 +22,14 @@ try:
 except ImportError:
     ODF_AVAILABLE = False
 
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+    # PDFium itself is not thread-safe; serialize calls across scoring threads
+    _PDFIUM_LOCK = threading.Lock()
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
 try:
     import pdfplumber
     PDF_AVAILABLE = True
@@ -61,13 +43,17 @@ class DocumentDetector(BaseDetector):
     def __init__(self, similarity_threshold: float = 0.95):
         super().__init__(similarity_threshold)
         # Use bounded cache to prevent unbounded memory growth
-        self.text_cache = BoundedCache(maxsize=1000)
+        self.text_cache = BoundedCache(maxsize=1000, max_bytes=256 * 1024 * 1024)
+        # Signatures are small, so cache them separately from the full text
+        self.signature_cache = BoundedCache(maxsize=100000)
+        self.max_simhash_distance = self.max_hamming_distance(64)
 
-    def extract_text(self, file_path: str) -> Optional[str]:
+    def extract_text(self, file_path: str, use_cache: bool = True) -> Optional[str]:
         """Extract text from various document formats"""
-        cached = self.text_cache.get(file_path)
-        if cached is not None:
-            return cached
+        if use_cache:
+            cached = self.text_cache.get(file_path)
+            if cached is not None:
+                return cached
         
         ext = os.path.splitext(file_path)[1].lower()
         text_content = None
@@ -79,13 +65,14 @@ class DocumentDetector(BaseDetector):
                 text_content = self._extract_docx(file_path)
             elif ext == '.odt' and ODF_AVAILABLE:
                 text_content = self._extract_odt(file_path)
-            elif ext == '.pdf' and PDF_AVAILABLE:
+            elif ext == '.pdf' and (PDFIUM_AVAILABLE or PDF_AVAILABLE):
                 text_content = self._extract_pdf(file_path)
             
             if text_content:
                 # Normalize whitespace
                 text_content = ' '.join(text_content.split())
-                self.text_cache.set(file_path, text_content)
+                if use_cache:
+                    self.text_cache.set(file_path, text_content)
             
             return text_content
         except Exception as e:
@@ -94,14 +81,7 @@ class DocumentDetector(BaseDetector):
     
     def _read_text_file(self, file_path: str) -> str:
         """Read plain text file"""
-        encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-        for encoding in encodings:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    return f.read()
-            except (UnicodeDecodeError, UnicodeError):
-                continue
-        return ""
+        return read_text_file(file_path)
     
     def _extract_docx(self, file_path: str) -> str:
         """Extract text from DOCX"""
@@ -118,6 +98,9 @@ class DocumentDetector(BaseDetector):
     
     def _extract_pdf(self, file_path: str) -> str:
         """Extract text from PDF"""
+        if PDFIUM_AVAILABLE:
+            return self._extract_pdf_pdfium(file_path)
+
         text_content = []
         with pdfplumber.open(file_path) as pdf:
             for page in pdf.pages:
@@ -125,15 +108,42 @@ class DocumentDetector(BaseDetector):
                 if page_text:
                     text_content.append(page_text)
         return '\n'.join(text_content)
+
+    def _extract_pdf_pdfium(self, file_path: str) -> str:
+        """Extract text from PDF with PDFium (no layout analysis, much faster)"""
+        text_content = []
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(file_path)
+            try:
+                for index in range(len(pdf)):
+                    page = pdf[index]
+                    textpage = page.get_textpage()
+                    try:
+                        page_text = textpage.get_text_range()
+                    finally:
+                        # Release PDFium page memory as we go
+                        textpage.close()
+                        page.close()
+                    if page_text:
+                        text_content.append(page_text)
+            finally:
+                pdf.close()
+        return '\n'.join(text_content)
     
     def compute_signature(self, file_path: str) -> Optional[str]:
-        """Compute hash of document text content"""
-        text = self.extract_text(file_path)
+        """Compute SimHash + SHA256 signature of document text content"""
+        cached = self.signature_cache.get(file_path)
+        if cached is not None:
+            return cached
+
+        # Only the signature is kept; the text is re-read if compare_files needs it
+        text = self.text_cache.get(file_path) or self.extract_text(file_path, use_cache=False)
         if not text or len(text.strip()) < 10:
             return None
         
-        # Use hash of normalized text
-        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+        signature = text_signature(text)
+        self.signature_cache.set(file_path, signature)
+        return signature
     
     def compare_files(self, file1: str, file2: str) -> float:
         """Compare two documents using fuzzy text matching"""
@@ -143,16 +153,39 @@ class DocumentDetector(BaseDetector):
         if not text1 or not text2:
             return 0.0
 
+        # Indel similarity can never exceed 2*min/(len1+len2), so skip pairs
+        # whose lengths alone rule out reaching the threshold
+        len1, len2 = len(text1), len(text2)
+        if 2 * min(len1, len2) < self.similarity_threshold * (len1 + len2):
+            return 0.0
+
         # Use token sort ratio for better matching
-        similarity = fuzz.token_sort_ratio(text1, text2) / 100.0
+        similarity = fuzz.token_sort_ratio(
+            text1, text2, score_cutoff=self.similarity_threshold * 100
+        ) / 100.0
         return similarity
 
+    def compare_bulk(self, paths1: List[str], paths2: List[str], workers: int = -1) -> np.ndarray:
+        """Return a len(paths1) x len(paths2) similarity matrix (0.0-1.0) of documents.
+
+        rapidfuzz.process.cdist scores the whole matrix in C across all cores,
+        instead of one token_sort_ratio call per pair. Pass workers=1 when
+        scoring several matrices from separate threads.
+        """
+        texts1 = [self.extract_text(path) or '' for path in paths1]
+        texts2 = texts1 if paths2 is paths1 else [self.extract_text(path) or '' for path in paths2]
+        scores = process.cdist(
+            texts1, texts2,
+            scorer=fuzz.token_sort_ratio,
+            score_cutoff=self.similarity_threshold * 100,
+            workers=workers
+        )
+        return scores / 100.0
+
     def compare_signatures(self, sig1: str, sig2: str) -> float:
-        """Compare document signatures. For exact hash match, returns 1.0.
-        For fuzzy matching, we need the original text (via text_cache lookup)."""
-        # Document signatures are SHA256 hashes, so exact match means identical content
-        if sig1 == sig2:
-            return 1.0
-        # For fuzzy matching, we'd need the text - return 0 for different hashes
-        # since prefix-based grouping should handle similar documents
-        return 0.0
+        """Compare document signatures. For exact hash match, returns 1.0,
+        otherwise the SimHash similarity of the token streams."""
+        return compare_text_signatures(sig1, sig2)
+
+    def signatures_match(self, sig1: str, sig2: str) -> bool:
+        return text_signatures_match(sig1, sig2, self.max_simhash_distance)
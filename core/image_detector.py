@@ -10,19 +10,152 @@ Images are only considered duplicates if ALL three hashes are similar,
 which dramatically reduces false positives.
 """
 import os
-from typing import Optional, Tuple
-import imagehash
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import Optional, Tuple, Dict, List, Callable
+import numpy as np
 from PIL import Image
 from .base import BaseDetector
+from .bktree import BKTree
+
+try:
+    import cupy as cp
+    # One popcount per uint64 word, using the CUDA __popcll intrinsic
+    _gpu_popcount = cp.ElementwiseKernel('uint64 x', 'uint8 y', 'y = __popcll(x)', 'hamming_popcount')
+    CUPY_AVAILABLE = cp.cuda.runtime.getDeviceCount() > 0
+except Exception:
+    # ImportError, or CUDA runtime errors when no driver/device is present
+    CUPY_AVAILABLE = False
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Count set bits in each element of a uint64 array"""
+    if CUPY_AVAILABLE and isinstance(words, cp.ndarray):
+        return _gpu_popcount(words)
+    if hasattr(np, 'bitwise_count'):  # NumPy 2.0+, uses POPCNT
+        return np.bitwise_count(words)
+    bits = np.unpackbits(words[..., None].view(np.uint8), axis=-1)
+    return bits.sum(axis=-1)
+
+
+def _hex_to_words(hex_str: str) -> np.ndarray:
+    """Pack a hex hash string into big-endian uint64 words"""
+    data = bytes.fromhex(hex_str if len(hex_str) % 2 == 0 else '0' + hex_str)
+    padding = (-len(data)) % 8
+    return np.frombuffer(b'\x00' * padding + data, dtype='>u8').astype(np.uint64)
+
+
+@lru_cache(maxsize=None)
+def _dct_basis(hash_size: int, size: int) -> np.ndarray:
+    """First hash_size rows of the unnormalised DCT-II matrix for size samples"""
+    k = np.arange(hash_size)[:, None]
+    n = np.arange(size)[None, :]
+    return 2 * np.cos(np.pi * k * (2 * n + 1) / (2 * size))
+
+
+@lru_cache(maxsize=None)
+def _resample_matrix(src: int, dst: int) -> np.ndarray:
+    """(dst, src) matrix approximating Pillow's LANCZOS resize along one axis"""
+    eye = Image.fromarray(np.eye(src, dtype=np.float32), 'F')
+    return np.asarray(eye.resize((dst, src), Image.LANCZOS), dtype=np.float64).T
+
+
+def _resample(pixels: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """LANCZOS-resize a square array to rows x cols as two small matrix
+    products, rounding after each pass like Pillow's 8-bit resampler"""
+    size = pixels.shape[0]
+    horizontal = np.clip(np.rint(pixels @ _resample_matrix(size, cols).T), 0, 255)
+    return np.clip(np.rint(_resample_matrix(size, rows) @ horizontal), 0, 255)
+
+
+def _bits_to_hex(bits: np.ndarray) -> str:
+    """Format a boolean grid as hex, matching imagehash's str() output"""
+    flat = bits.ravel()
+    padding = (-flat.size) % 8
+    if padding:
+        flat = np.concatenate([np.zeros(padding, dtype=bool), flat])
+    width = (bits.size + 3) // 4
+    return np.packbits(flat).tobytes().hex()[-width:]
+
+
+def _hash_gray(small: Image.Image, hash_size: int) -> str:
+    """Compute ahash|phash|dhash from one grayscale downscale of an image.
+
+    Follows imagehash's algorithms, but decodes and resizes the image once
+    instead of once per hash.
+
+    Args:
+        small: Grayscale image already resized to (4 * hash_size) squared
+        hash_size: Hash grid size
+    """
+    size = hash_size * 4
+    pixels = np.asarray(small, dtype=np.float64)
+
+    # phash: low frequencies of the 2D DCT against their median
+    basis = _dct_basis(hash_size, size)
+    lowfreq = basis @ pixels @ basis.T
+    phash = lowfreq > np.median(lowfreq)
+
+    # ahash/dhash: resample the small image rather than the full-size
+    # original, as two tiny matrix products instead of two Pillow resizes.
+    # This is not bit-identical to resizing the original, and even against
+    # Pillow resizing the small image, float rounding differs by up to one
+    # grey level on a few percent of inputs, which can flip a near-tied bit
+    tiny = _resample(pixels, hash_size, hash_size)
+    ahash = tiny > tiny.mean()
+    wide = _resample(pixels, hash_size, hash_size + 1)
+    dhash = wide[:, 1:] > wide[:, :-1]
+
+    return f"{_bits_to_hex(ahash)}|{_bits_to_hex(phash)}|{_bits_to_hex(dhash)}"
 
 
 class ImageDetector(BaseDetector):
     """Detect duplicate images using multi-hash perceptual hashing"""
 
+    # Above this many images, an O(N log N)-ish BK-tree search replaces the
+    # O(N^2) all-pairs distance matrix
+    BKTREE_MIN_SIZE = 20000
+
+    # Files whose sizes differ by more than this factor are never compared.
+    # Generous on purpose: re-encodes and resized copies legitimately differ
+    # several-fold, but a 20KB icon and a 5MB photo are not duplicates.
+    MAX_SIZE_RATIO = 20.0
+
+    # With a CUDA GPU (CuPy), the all-pairs matrix runs on the device from
+    # this many images up, and replaces the BK-tree at large sizes
+    GPU_MIN_SIZE = 2000
+
+    # Decoded images queued ahead of hashing, per decoder thread
+    DECODE_AHEAD = 16
+
+    # Bumped whenever the hashing pipeline changes, so cached signatures
+    # from earlier versions are not compared against new ones
+    SIGNATURE_VERSION = 3
+
+    # JPEGs are DCT-decoded to at least this multiple of the hash input
+    # before the LANCZOS downscale. Decoding straight down to the hash input
+    # aliases enough that a PNG and a JPEG of one photo drift apart.
+    DRAFT_OVERSAMPLE = 4
+
     def __init__(self, similarity_threshold: float = 0.95, hash_size: int = 12):
         super().__init__(similarity_threshold)
         self.hash_size = hash_size  # Increased from 8 for better discrimination
         self.cache = {}  # Cache computed hashes
+        # Signature -> (3, words) uint64 array, so comparisons never re-parse hex
+        self.packed_cache: Dict[str, np.ndarray] = {}
+        # Signature -> per-hash Python ints, for one-off pair comparisons
+        self.int_cache: Dict[str, Tuple[int, ...]] = {}
+        # similarity >= threshold  <=>  distance <= max_allowed_distance
+        self.max_allowed_distance = self.max_hamming_distance(hash_size * hash_size)
+
+    def worker_kwargs(self) -> Dict:
+        return {'similarity_threshold': self.similarity_threshold,
+                'hash_size': self.hash_size}
+
+    def signature_cache_key(self) -> str:
+        return f"{type(self).__name__}:{self.hash_size}:v{self.SIGNATURE_VERSION}"
 
     def compute_signature(self, file_path: str) -> Optional[str]:
         """Compute multi-hash signature for image.
@@ -32,26 +165,32 @@ class ImageDetector(BaseDetector):
         if file_path in self.cache:
             return self.cache[file_path]
 
-        try:
-            if not os.path.exists(file_path):
-                return None
+        small = self._load_small_gray(file_path)
+        if small is None:
+            return None
 
-            with Image.open(file_path) as img:
-                img.verify()
+        # Compute three different hash types for robustness
+        combined = _hash_gray(small, self.hash_size)
+        self.cache[file_path] = combined
+        return combined
 
+    def _load_small_gray(self, file_path: str) -> Optional[Image.Image]:
+        """Decode an image and downscale it to the grayscale hash input"""
+        try:
+            # A single open: missing files raise FileNotFoundError and corrupt
+            # ones raise from the decode in convert() below, so neither an
+            # exists() stat nor a verify() pass is needed up front
             with Image.open(file_path) as img:
+                # JPEGs decode straight to grayscale at 1/2..1/8 scale in the
+                # DCT domain; a no-op for other formats
+                hash_input = self.hash_size * 4
+                draft_size = hash_input * self.DRAFT_OVERSAMPLE
+                img.draft('L', (draft_size, draft_size))
+
                 if img.mode not in ('RGB', 'L'):
                     img = img.convert('RGB')
 
-                # Compute three different hash types for robustness
-                ahash = imagehash.average_hash(img, hash_size=self.hash_size)
-                phash = imagehash.phash(img, hash_size=self.hash_size)
-                dhash = imagehash.dhash(img, hash_size=self.hash_size)
-
-                # Combine into single signature with delimiter
-                combined = f"{ahash}|{phash}|{dhash}"
-                self.cache[file_path] = combined
-                return combined
+                return img.convert('L').resize((hash_input, hash_input), Image.LANCZOS)
 
         except (IOError, OSError, Image.UnidentifiedImageError):
             return None
@@ -59,6 +198,59 @@ class ImageDetector(BaseDetector):
             print(f"Warning: Could not process image {file_path}: {e}")
             return None
 
+    def compute_signatures_bulk(self, paths: List[str], max_workers: Optional[int] = None,
+                                progress_callback: Optional[Callable] = None,
+                                should_stop: Optional[Callable] = None) -> Dict[str, str]:
+        """Compute signatures with decoding overlapped across a thread pool.
+
+        Decoding and resampling is nearly all of the per-image cost and Pillow
+        releases the GIL for it, so decoder threads keep the disk and every
+        core busy while this thread hashes the small results in order. At most
+        a fixed window of decoded images is held in memory at once.
+
+        Args:
+            paths: Image paths to hash
+            max_workers: Decoder pool size (defaults to os.cpu_count())
+            progress_callback: Optional callback(completed, total)
+            should_stop: Optional callable; returning True cancels pending work
+
+        Returns:
+            Dict mapping path to signature (failed files are omitted)
+        """
+        signatures = {}
+        total = len(paths)
+        workers = max_workers or os.cpu_count() or 1
+        path_iter = iter(paths)
+        pending = deque()
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            for path in islice(path_iter, workers * self.DECODE_AHEAD):
+                pending.append((path, executor.submit(self._load_small_gray, path)))
+
+            done = 0
+            while pending:
+                if should_stop and should_stop():
+                    break
+
+                path, future = pending.popleft()
+                next_path = next(path_iter, None)
+                if next_path is not None:
+                    pending.append((next_path, executor.submit(self._load_small_gray, next_path)))
+
+                small = future.result()
+                if small is not None:
+                    sig = _hash_gray(small, self.hash_size)
+                    self.cache[path] = sig
+                    signatures[path] = sig
+
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return signatures
+
     def _parse_signature(self, sig: str) -> Optional[Tuple[str, str, str]]:
         """Parse combined signature into individual hashes."""
         parts = sig.split('|')
@@ -76,6 +268,194 @@ class ImageDetector(BaseDetector):
 
         return self.compare_signatures(hash1, hash2)
 
+    def pack_signature(self, sig: str) -> Optional[np.ndarray]:
+        """Parse a signature once into a (3, words) uint64 array (cached)"""
+        packed = self.packed_cache.get(sig)
+        if packed is None:
+            parts = self._parse_signature(sig)
+            if not parts:
+                return None
+            try:
+                packed = np.stack([_hex_to_words(part) for part in parts])
+            except ValueError:
+                return None
+            self.packed_cache[sig] = packed
+        return packed
+
+    def hash_ints(self, sig: str) -> Optional[Tuple[int, ...]]:
+        """Parse a signature once into one Python int per hash (cached)"""
+        ints = self.int_cache.get(sig)
+        if ints is None:
+            parts = self._parse_signature(sig)
+            if not parts:
+                return None
+            try:
+                ints = tuple(int(part, 16) for part in parts)
+            except ValueError:
+                return None
+            self.int_cache[sig] = ints
+        return ints
+
+    def compare_packed(self, packed1: np.ndarray, packed2: np.ndarray) -> float:
+        """Compare two packed signatures with XOR + popcount.
+
+        Returns the MINIMUM similarity across the three hash types.
+        """
+        if packed1.shape != packed2.shape:
+            return 0.0
+        max_distance = self.hash_size * self.hash_size
+        distances = _popcount(packed1 ^ packed2).sum(axis=1)
+        return 1.0 - int(distances.max()) / max_distance
+
+    def find_similar_pairs(self, signatures: List[str], sizes: Optional[List[int]] = None,
+                           progress_callback: Optional[Callable] = None,
+                           should_stop: Optional[Callable] = None) -> List[Tuple[int, int, float]]:
+        """Find all pairs of signatures whose similarity meets the threshold.
+
+        Small sets use a vectorized all-pairs Hamming matrix; large sets use a
+        BK-tree range search so the work does not grow quadratically. When
+        CuPy and a CUDA device are available, larger sets run the matrix on
+        the GPU instead.
+
+        Args:
+            signatures: Signatures from compute_signature
+            sizes: Optional file sizes; pairs whose sizes differ by more than
+                MAX_SIZE_RATIO are skipped
+            progress_callback: Optional callback(done, total)
+            should_stop: Optional callable; returning True aborts the search
+
+        Returns:
+            List of (i, j, similarity) with i < j, indexing into signatures
+        """
+        packed = [self.pack_signature(sig) for sig in signatures]
+        valid = [idx for idx, p in enumerate(packed) if p is not None]
+        if len(valid) < 2:
+            return []
+
+        max_distance = self.hash_size * self.hash_size
+        max_allowed = self.max_allowed_distance
+
+        if sizes is not None:
+            # Sorting by size makes each file's comparable sizes a contiguous run
+            valid.sort(key=lambda idx: sizes[idx])
+
+        if CUPY_AVAILABLE and len(valid) >= self.GPU_MIN_SIZE:
+            pairs = self._pairs_matrix(packed, valid, max_allowed,
+                                       progress_callback, should_stop, sizes, xp=cp)
+        elif len(valid) >= self.BKTREE_MIN_SIZE:
+            pairs = self._pairs_bktree(signatures, valid, max_allowed,
+                                       progress_callback, should_stop)
+            if sizes is not None:
+                pairs = [(i, j, distance) for i, j, distance in pairs
+                         if self._sizes_comparable(sizes[i], sizes[j])]
+        else:
+            pairs = self._pairs_matrix(packed, valid, max_allowed,
+                                       progress_callback, should_stop, sizes)
+
+        return [(min(i, j), max(i, j), 1.0 - distance / max_distance) for i, j, distance in pairs]
+
+    def _sizes_comparable(self, size1: int, size2: int) -> bool:
+        small, large = sorted((max(size1, 1), max(size2, 1)))
+        return large <= small * self.MAX_SIZE_RATIO
+
+    def _pairs_matrix(self, packed, valid, max_allowed, progress_callback, should_stop,
+                      sizes=None, xp=np):
+        """All-pairs search: stack the packed hashes into one (N, 3, words)
+        matrix and compute distances with vectorized XOR + popcount, tiled in
+        row blocks to bound memory.
+
+        Every hash must be within max_allowed, so the full distance matrix is
+        only built for the first hash; the other two are computed just for
+        the pairs that survive it.
+
+        With sizes, valid must be sorted by size; each block is then only
+        compared against the rows up to MAX_SIZE_RATIO times its largest file.
+        Pass xp=cupy to run the same computation on the GPU.
+        """
+        matrix = xp.asarray(np.stack([packed[idx] for idx in valid]))
+        first = matrix[:, 0]
+        n = len(valid)
+        if sizes is not None:
+            sorted_sizes = xp.asarray(
+                np.maximum(np.array([sizes[idx] for idx in valid], dtype=np.float64), 1)
+            )
+
+        # Keep each block's XOR tensor around 64 MiB
+        row_bytes = first[0].nbytes * n
+        block_rows = max(1, (64 * 1024 * 1024) // max(row_bytes, 1))
+
+        pairs = []
+        for start in range(0, n - 1, block_rows):
+            if should_stop and should_stop():
+                break
+            stop = min(start + block_rows, n - 1)
+            # Only compare against later rows so each pair is visited once
+            end = n
+            if sizes is not None:
+                end = int(xp.searchsorted(sorted_sizes, sorted_sizes[stop - 1] * self.MAX_SIZE_RATIO,
+                                          side='right'))
+            first_distances = _popcount(first[start:stop, None] ^ first[None, start + 1:end]).sum(axis=-1)
+
+            matches = first_distances <= max_allowed
+            # Column c is row start + 1 + c, so c >= r keeps pairs with j > i
+            matches &= xp.arange(end - start - 1)[None, :] >= xp.arange(stop - start)[:, None]
+            if sizes is not None:
+                # Smaller files in the block have tighter limits than its largest
+                limits = sorted_sizes[start:stop, None] * self.MAX_SIZE_RATIO
+                matches &= sorted_sizes[None, start + 1:end] <= limits
+            rows, cols = xp.nonzero(matches)
+            if len(rows) == 0:
+                if progress_callback:
+                    progress_callback(stop, n - 1)
+                continue
+
+            # Verify the survivors against the remaining hashes
+            i = start + rows
+            j = start + 1 + cols
+            rest = _popcount(matrix[i, 1:] ^ matrix[j, 1:]).sum(axis=-1).max(axis=-1)
+            distances = xp.maximum(first_distances[rows, cols], rest)
+            keep = distances <= max_allowed
+
+            # Gather matches in one transfer rather than indexing per pair
+            for i_, j_, distance in zip(i[keep].tolist(), j[keep].tolist(),
+                                        distances[keep].tolist()):
+                pairs.append((valid[i_], valid[j_], int(distance)))
+
+            if progress_callback:
+                progress_callback(stop, n - 1)
+
+        return pairs
+
+    def _pairs_bktree(self, signatures, valid, max_allowed,
+                      progress_callback, should_stop):
+        """BK-tree search keyed on the first (average) hash.
+
+        Every hash must be within max_allowed for a match, so a range query on
+        one hash yields a superset of the matches; the candidates are then
+        verified against all three hashes.
+        """
+        tree = BKTree()
+        pairs = []
+        total = len(valid)
+        for done, idx in enumerate(valid, 1):
+            if should_stop and done % 1000 == 0 and should_stop():
+                break
+
+            ints = self.hash_ints(signatures[idx])
+            key = ints[0]
+            # The tree only holds earlier files, so each pair is found once
+            for other, _ in tree.query(key, max_allowed):
+                other_ints = self.hash_ints(signatures[other])
+                distance = max((a ^ b).bit_count() for a, b in zip(ints, other_ints))
+                if distance <= max_allowed:
+                    pairs.append((other, idx, distance))
+            tree.add(key, idx)
+
+            if progress_callback and done % 1000 == 0:
+                progress_callback(done, total)
+
+        return pairs
+
     def compare_signatures(self, sig1: str, sig2: str) -> float:
         """Compare two multi-hash signatures.
 
@@ -83,56 +463,60 @@ class ImageDetector(BaseDetector):
         This ensures that images must be similar in structure, gradients,
         AND overall appearance to be considered duplicates.
         """
-        try:
-            parts1 = self._parse_signature(sig1)
-            parts2 = self._parse_signature(sig2)
-
-            if not parts1 or not parts2:
-                return 0.0
+        # Signatures from different hash sizes are never comparable
+        if len(sig1) != len(sig2):
+            return 0.0
 
-            max_distance = self.hash_size * self.hash_size
-            similarities = []
+        ints1 = self.hash_ints(sig1)
+        ints2 = self.hash_ints(sig2)
 
-            for h1_str, h2_str in zip(parts1, parts2):
-                h1 = imagehash.hex_to_hash(h1_str)
-                h2 = imagehash.hex_to_hash(h2_str)
-                distance = h1 - h2
-                sim = 1.0 - (distance / max_distance)
-                similarities.append(sim)
+        if ints1 is None or ints2 is None:
+            return 0.0
 
-            # Return MINIMUM similarity - all hashes must agree
-            # This prevents false positives where only one hash type matches
-            return min(similarities)
+        # Return MINIMUM similarity - all hashes must agree
+        # This prevents false positives where only one hash type matches.
+        # XOR + int.bit_count() is a single POPCNT per word, with none of
+        # numpy's per-call overhead for a lone pair.
+        max_distance = self.hash_size * self.hash_size
+        distance = max((a ^ b).bit_count() for a, b in zip(ints1, ints2))
+        return 1.0 - distance / max_distance
 
-        except Exception:
-            return 0.0
+    def signatures_match(self, sig1: str, sig2: str) -> bool:
+        """Integer-distance form of compare_signatures() >= threshold"""
+        if len(sig1) != len(sig2):
+            return False
+        ints1 = self.hash_ints(sig1)
+        ints2 = self.hash_ints(sig2)
+        if ints1 is None or ints2 is None or len(ints1) != len(ints2):
+            return False
+        limit = self.max_allowed_distance
+        return all((a ^ b).bit_count() <= limit for a, b in zip(ints1, ints2))
     
     def create_thumbnail(self, file_path: str, output_path: str, size: tuple = (200, 200)):
         """Create a thumbnail for an image"""
         try:
             with Image.open(file_path) as img:
-                # Convert RGBA/P to RGB for JPEG compatibility
-                if img.mode in ('RGBA', 'P', 'LA'):
-                    # Create white background
+                # Let JPEGs decode at a reduced DCT scale, keeping 2x headroom
+                # over the thumbnail size for a clean LANCZOS downscale
+                img.draft(img.mode, (size[0] * 2, size[1] * 2))
+
+                # Palette images only resize with NEAREST, so expand them first
+                if img.mode == 'P':
+                    img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+                elif img.mode not in ('RGB', 'L', 'RGBA', 'LA'):
+                    img = img.convert('RGB')
+
+                # Downscale before compositing so the alpha paste only
+                # touches thumbnail-sized pixels
+                img.thumbnail(size, Image.Resampling.LANCZOS)
+
+                # Flatten transparency onto white for JPEG compatibility
+                if img.mode in ('RGBA', 'LA'):
                     rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-                    # If image has transparency, paste it on white background
-                    if img.mode == 'RGBA' or img.mode == 'LA':
-                        rgb_img.paste(img, mask=img.split()[-1])  # Use alpha channel as mask
-                    elif img.mode == 'P':
-                        # Handle palette mode (like GIFs)
-                        if 'transparency' in img.info:
-                            img_rgba = img.convert('RGBA')
-                            rgb_img.paste(img_rgba, mask=img_rgba.split()[-1])
-                        else:
-                            rgb_img = img.convert('RGB')
-                    final_img = rgb_img
-                elif img.mode not in ('RGB', 'L'):
-                    final_img = img.convert('RGB')
-                else:
-                    final_img = img.copy()
-
-                final_img.thumbnail(size, Image.Resampling.LANCZOS)
-                final_img.save(output_path, 'JPEG', quality=85)
+                    rgb_img.paste(img, mask=img.split()[-1])  # Use alpha channel as mask
+                    img = rgb_img
+
+                img.save(output_path, 'JPEG', quality=85)
                 return True
         except Exception:
             # Silently fail on thumbnail creation - not critical
@@ -2,30 +2,116 @@
 Main scanning engine that coordinates duplicate detection.
 """
 import os
-import time
+import threading
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from typing import List, Dict, Tuple, Optional, Callable
-from collections import defaultdict
+from collections import defaultdict, Counter
 from pathlib import Path
 
-from .base import FileScanner, FileInfo
+from .base import BaseDetector, FileScanner, FileInfo, XXHASH_AVAILABLE
 from .image_detector import ImageDetector
 from .document_detector import DocumentDetector
 from .video_detector import VideoDetector
 from .archive_code_detector import ArchiveDetector, CodeDetector
-from database.models import Database, DuplicateGroup, FileEntry
+from database.models import Database
+
+
+# Detector instance owned by each signature worker process
+_worker_detector = None
+
+
+def _init_signature_worker(detector_class, kwargs):
+    """Build a fresh detector once per worker process"""
+    global _worker_detector
+    _worker_detector = detector_class(**kwargs)
+
+
+def _worker_compute_sig(paths: List[str]) -> List[Tuple[str, Optional[str]]]:
+    """Compute signatures for a chunk of paths inside a worker process"""
+    return [(path, _worker_detector.compute_signature(path)) for path in paths]
+
+
+class _ProgressRelay:
+    """Forwards step progress to the scan-wide progress_callback (0-100).
+
+    One instance is reused for the whole scan; scan_paths updates the
+    attributes as it moves between folders and categories.
+    """
+
+    def __init__(self, progress_callback: Callable):
+        self.progress_callback = progress_callback
+        self.step = 0           # index of the current folder/category
+        self.step_count = 1
+        self.discovered = 0     # files found in folders already scanned
+        self.label = ''
+
+    def files_found(self, file_path: str, count: int):
+        """FileScanner callback during discovery"""
+        self.progress_callback(
+            int(self.step / self.step_count * 100),
+            100,
+            f"Discovered {self.discovered + count} files"
+        )
+
+    def __call__(self, current: int, total: int):
+        """Per-category (current, total) callback during analysis"""
+        self.progress_callback(
+            int((self.step + current / total) / self.step_count * 100),
+            100,
+            f"Analyzing {self.label}: {current}/{total}"
+        )
 
 
 class DuplicateScanner:
     """Main scanner engine"""
 
+    # Categories whose detectors find near-duplicates, not just identical files
+    FUZZY_CATEGORIES = ('image', 'video', 'document', 'code')
+
+    # Number of duplicate groups written per multi-row insert
+    INSERT_BATCH_SIZE = 1000
+
+    # LSH over the leading 64-bit SimHash of text signatures: 4 bands of
+    # 4 hex chars (16 bits) each
+    LSH_BANDS = 4
+    LSH_BAND_CHARS = 4
+
+    # Buckets at least this large are scored with all cores in one call;
+    # smaller ones are scored concurrently, one core each
+    INLINE_SCORE_MIN_SIZE = 64
+
+    # Cached signatures unused by any scan for this long are pruned
+    SIGNATURE_CACHE_MAX_AGE_DAYS = 90
+
+    # Below this many files, worker process startup costs more than it saves
+    PROCESS_POOL_MIN_FILES = 64
+    # Paths sent to a worker per task
+    PROCESS_CHUNK_SIZE = 16
+
+    # Exact-hash files of at least this size are first compared by a
+    # start/middle/end sample hash, so files that differ early are never
+    # read in full
+    SAMPLE_HASH_MIN_SIZE = 1024 * 1024
+
+    # Duplicates up to this size get an XXH3-128 content hash when saved;
+    # larger ones (mostly videos, whose detector only samples frames) are
+    # hashed by the results viewer if it ever needs them
+    CONTENT_HASH_MAX_SIZE = 64 * 1024 * 1024
+
+    # Hashing is I/O-bound on SSDs, so more workers than a small default
+    # pays off; capped so HDD seeks do not thrash
+    DEFAULT_THREAD_COUNT = min(8, os.cpu_count() or 4)
+
     def __init__(self, db: Database, session_id: int,
                  file_types: List[str], similarity_threshold: float = 0.95,
-                 thread_count: int = 4):
+                 thread_count: int = DEFAULT_THREAD_COUNT):
         self.db = db
         self.session_id = session_id
         self.file_types = file_types
         self.similarity_threshold = similarity_threshold
-        self.thread_count = thread_count  # For future parallel processing
+        self.thread_count = thread_count
         
         # Initialize detectors
         self.detectors = {}
@@ -41,8 +127,14 @@ class DuplicateScanner:
             self.detectors['code'] = CodeDetector(similarity_threshold)
         
         self.scanner = FileScanner(file_types)
-        self.is_paused = False
+        # Set while running; cleared to pause. Waiters block on it without polling.
+        self._resume_event = threading.Event()
+        self._resume_event.set()
         self.is_stopped = False
+
+    @property
+    def is_paused(self) -> bool:
+        return not self._resume_event.is_set()
     
     def scan_paths(self, paths: List[Tuple[str, bool]], 
                    progress_callback: Optional[Callable] = None,
@@ -59,19 +151,19 @@ class DuplicateScanner:
         if status_callback:
             status_callback("📂 Phase 1/3: Discovering files...")
         
+        relay = _ProgressRelay(progress_callback) if progress_callback else None
         all_files = []
         for path_idx, (path, include_subdirs) in enumerate(paths):
             if status_callback:
                 status_callback(f"📂 Phase 1/3: Scanning folder {path_idx + 1}/{len(paths)}...")
             
+            if relay:
+                relay.step, relay.step_count = path_idx, len(paths)
+                relay.discovered = len(all_files)
             files = self.scanner.scan_directory(
                 path, 
                 include_subdirs,
-                progress_callback=lambda fp, count: progress_callback(
-                    int((path_idx / len(paths)) * 100),
-                    100,
-                    f"Discovered {len(all_files) + count} files"
-                ) if progress_callback else None
+                progress_callback=relay.files_found if relay else None
             )
             all_files.extend(files)
         
@@ -88,7 +180,8 @@ class DuplicateScanner:
         # Step 2: Group files by category
         files_by_category = defaultdict(list)
         for file_info in all_files:
-            category = self.scanner.get_file_category(file_info.path)
+            # FileInfo already holds the lowercased extension
+            category = self.scanner.category_by_ext.get(file_info.ext)
             if category:
                 files_by_category[category].append(file_info)
         
@@ -98,226 +191,656 @@ class DuplicateScanner:
         os.makedirs(thumbnails_dir, exist_ok=True)
         
         # Calculate total work for progress
-        total_categories = len(files_by_category)
+        categories = [(category, files) for category, files in files_by_category.items()
+                      if category in self.detectors]
+        total_categories = len(categories)
         current_category = 0
+
+        # Signatures for the next category are computed in the background
+        # while this one is searched and saved, so the CPU-bound hashing
+        # overlaps the mostly serial grouping and database work
+        signature_pool = ThreadPoolExecutor(max_workers=1)
+        pending_signatures = None
+        # One writer thread owns the session; thumbnails are decoded and
+        # encoded on their own pool
+        writer_pool = ThreadPoolExecutor(max_workers=1)
+        thumbnail_pool = ThreadPoolExecutor(max_workers=self.thread_count)
+        save_futures = []
         
-        for category, files in files_by_category.items():
-            if self.is_stopped:
-                break
-            
-            current_category += 1
-            category_display = category.title() + 's'
-            
-            if status_callback:
-                status_callback(f"🔍 Phase 2/3: Analyzing {category_display} ({len(files)} files)...")
-            
-            detector = self.detectors.get(category)
-            if not detector:
-                continue
-            
-            # Find duplicates
-            duplicates = self._find_duplicates(
-                files, detector, category,
-                lambda cur, tot: progress_callback(
-                    int(((current_category - 1) / total_categories + (cur / tot / total_categories)) * 100),
-                    100,
-                    f"Analyzing {category_display}: {cur}/{tot}"
-                ) if progress_callback else None
-            )
-            
-            if status_callback:
-                status_callback(f"💾 Phase 3/3: Saving {category_display} results...")
-            
-            # Save to database
-            for group_files, similarity in duplicates:
-                if self.is_stopped:
+        try:
+            for category, files in categories:
+                if self._wait_if_paused():
                     break
 
-                dup_group = DuplicateGroup(
-                    session_id=self.session_id,
-                    file_type=category,
-                    similarity_score=similarity
-                )
-                session.add(dup_group)
-                session.flush()  # Get the group ID
-
-                # Only create one thumbnail per group (for the first file)
-                # This optimization reduces disk I/O and processing time
-                group_thumbnail_path = None
-                if category in ['image', 'video'] and group_files:
-                    first_file = group_files[0]
-                    thumb_name = f"{dup_group.id}_representative.jpg"
-                    group_thumbnail_path = os.path.join(thumbnails_dir, thumb_name)
-                    detector.create_thumbnail(first_file.path, group_thumbnail_path)
-
-                for file_info in group_files:
-                    file_entry = FileEntry(
-                        group_id=dup_group.id,
-                        file_path=file_info.path,
-                        file_size=file_info.size,
-                        modified_time=file_info.modified,
-                        thumbnail_path=group_thumbnail_path  # All files in group share the same thumbnail
+                current_category += 1
+                category_display = category.title() + 's'
+
+                if status_callback:
+                    status_callback(f"🔍 Phase 2/3: Analyzing {category_display} ({len(files)} files)...")
+
+                detector = self.detectors[category]
+                if relay:
+                    relay.step, relay.step_count = current_category - 1, total_categories
+                    relay.label = category_display
+
+                if pending_signatures is not None:
+                    files, file_signatures = pending_signatures.result()
+                else:
+                    files, file_signatures = self._compute_signatures(
+                        files, detector, category, relay
                     )
-                    session.add(file_entry)
-            
-            session.commit()
-        
-        session.close()
+
+                pending_signatures = None
+                if current_category < total_categories:
+                    next_category, next_files = categories[current_category]
+                    pending_signatures = signature_pool.submit(
+                        self._compute_signatures, next_files,
+                        self.detectors[next_category], next_category
+                    )
+
+                # Find duplicates
+                duplicates = self._find_duplicates(
+                    files, detector, category, relay, file_signatures
+                )
+
+                if status_callback:
+                    status_callback(f"💾 Phase 3/3: Saving {category_display} results...")
+
+                # Rows are written on a single background writer so the next
+                # category's search is not held up by SQLite commits
+                save_futures.append(writer_pool.submit(
+                    self._save_results, session, category, detector,
+                    duplicates, file_signatures, thumbnail_pool, thumbnails_dir
+                ))
+        finally:
+            # Also reached when a category raises, so no pool's threads
+            # outlive the scan. A stop can leave the next category's
+            # signatures in flight.
+            signature_pool.shutdown(wait=True)
+            writer_pool.shutdown(wait=True)
+            # Thumbnails are written after their rows are committed; the scan
+            # is only complete once they are all on disk
+            thumbnail_pool.shutdown(wait=True, cancel_futures=self.is_stopped)
+            session.close()
+        for future in save_futures:
+            future.result()
+
+        self.db.prune_signature_cache(self.SIGNATURE_CACHE_MAX_AGE_DAYS)
         
         if status_callback and not self.is_stopped:
             status_callback("✅ Scan complete!")
     
+    def _save_results(self, session, category: str, detector,
+                      duplicates: List[Tuple[List[FileInfo], float]],
+                      file_signatures: Optional[Dict[str, str]],
+                      thumbnail_pool: ThreadPoolExecutor, thumbnails_dir: str):
+        """Write one category's groups and files, then commit.
+
+        Runs on the writer thread. Groups go in with one multi-row insert per
+        batch (returning their ids) and their files with another; image and
+        video thumbnails are queued on thumbnail_pool once ids are known.
+        """
+        make_thumbnails = category in ['image', 'video']
+        # Archive signatures hashed with XXH3-128 already are the content hash
+        known_hashes = {}
+        if getattr(detector, 'HASH_ALGORITHM', None) == 'xxh3_128' and file_signatures:
+            known_hashes = file_signatures
+        hash_pool = ThreadPoolExecutor(max_workers=self.thread_count) if XXHASH_AVAILABLE else None
+        try:
+            for batch_start in range(0, len(duplicates), self.INSERT_BATCH_SIZE):
+                if self._wait_if_paused():
+                    break
+
+                batch = duplicates[batch_start:batch_start + self.INSERT_BATCH_SIZE]
+                self._save_batch(session, category, detector, batch, make_thumbnails,
+                                 known_hashes, hash_pool, thumbnail_pool, thumbnails_dir)
+        finally:
+            if hash_pool is not None:
+                hash_pool.shutdown(wait=True)
+
+    def _save_batch(self, session, category: str, detector,
+                    batch: List[Tuple[List[FileInfo], float]], make_thumbnails: bool,
+                    known_hashes: Dict[str, str], hash_pool: Optional[ThreadPoolExecutor],
+                    thumbnail_pool: ThreadPoolExecutor, thumbnails_dir: str):
+        """Insert one batch of groups and their files, then commit"""
+        # Content hashes of small files are read before the inserts so the
+        # write lock is not held during file I/O
+        content_hashes = {}
+        if hash_pool is not None:
+            paths = [
+                file_info.path for group_files, _ in batch for file_info in group_files
+                if file_info.path not in known_hashes
+                and file_info.size <= self.CONTENT_HASH_MAX_SIZE
+            ]
+            content_hashes = dict(zip(paths, hash_pool.map(self._content_hash, paths)))
+
+        group_ids = self.db.bulk_insert_groups([
+            {
+                'session_id': self.session_id,
+                'file_type': category,
+                'similarity_score': similarity
+            }
+            for _, similarity in batch
+        ], session)
+
+        pending_entries = []
+        thumbnail_jobs = []
+        for group_id, (group_files, similarity) in zip(group_ids, batch):
+            # Only create one thumbnail per group (for the first file)
+            # This optimization reduces disk I/O and processing time
+            group_thumbnail_path = None
+            if make_thumbnails and group_files:
+                thumb_name = f"{group_id}_representative.jpg"
+                group_thumbnail_path = os.path.join(thumbnails_dir, thumb_name)
+                thumbnail_jobs.append((group_files[0].path, group_thumbnail_path))
+
+            for file_info in group_files:
+                pending_entries.append({
+                    'group_id': group_id,
+                    'file_path': file_info.path,
+                    'file_size': file_info.size,
+                    'modified_time': file_info.modified,
+                    'thumbnail_path': group_thumbnail_path,  # All files in group share the same thumbnail
+                    'content_xxh128': known_hashes.get(file_info.path) or content_hashes.get(file_info.path)
+                })
+
+        self.db.bulk_insert_files(pending_entries, session)
+        session.commit()
+
+        # Submitted only after the commit so the write lock is never held
+        # while images are decoded
+        for source_path, thumbnail_path in thumbnail_jobs:
+            thumbnail_pool.submit(detector.create_thumbnail, source_path, thumbnail_path)
+
+    @staticmethod
+    def _content_hash(path: str) -> Optional[str]:
+        """XXH3-128 of a file's content, or None if it cannot be read"""
+        try:
+            return BaseDetector.file_hash(path, 'xxh3_128')
+        except OSError:
+            return None
+
+    def _compute_signatures(self, files: List[FileInfo], detector, category: str,
+                            progress_callback: Optional[Callable] = None
+                            ) -> Tuple[List[FileInfo], Dict[str, str]]:
+        """Compute (or load cached) signatures for one category's files.
+
+        Returns the files that still need comparing and their signatures.
+        """
+        # Exact-hash categories can only match files of identical size,
+        # so files with a unique size never need to be hashed
+        if category not in self.FUZZY_CATEGORIES:
+            files = self._drop_unique_sizes(files)
+
+        # Reuse signatures cached by earlier scans for files whose mtime
+        # and size are unchanged
+        cache_key = detector.signature_cache_key()
+        file_stats = {file_info.path: (file_info.mtime, file_info.size) for file_info in files}
+        file_signatures: Dict[str, str] = self.db.get_cached_signatures(cache_key, file_stats)
+
+        if category not in self.FUZZY_CATEGORIES:
+            files = self._drop_unique_samples(files, file_signatures, detector)
+        paths = [file_info.path for file_info in files if file_info.path not in file_signatures]
+
+        # Videos are only sampled, so warming the page cache would be wasted I/O
+        if category != 'video':
+            self.scanner.prefetch(files)
+
+        if hasattr(detector, 'compute_signatures_bulk'):
+            # Detector can hash files concurrently (archives, images, videos)
+            computed = detector.compute_signatures_bulk(
+                paths,
+                max_workers=self.thread_count,
+                progress_callback=progress_callback,
+                should_stop=self._wait_if_paused
+            )
+        elif self.thread_count > 1 and len(paths) >= self.PROCESS_POOL_MIN_FILES:
+            # Decoding and hashing is CPU-bound, so spread it across processes
+            computed = self._compute_signatures_parallel(
+                paths, detector, progress_callback
+            )
+        else:
+            computed = {}
+            total = len(paths)
+            for idx, path in enumerate(paths):
+                if self._wait_if_paused():
+                    break
+
+                if progress_callback:
+                    progress_callback(idx + 1, total)
+
+                sig = detector.compute_signature(path)
+                if sig:
+                    computed[path] = sig
+
+        file_signatures.update(computed)
+        self.db.store_signatures(
+            cache_key,
+            ((path, *file_stats[path], sig) for path, sig in computed.items())
+        )
+        return files, file_signatures
+
     def _find_duplicates(self, files: List[FileInfo], detector, category: str,
-                        progress_callback: Optional[Callable] = None) -> List[Tuple[List[FileInfo], float]]:
-        """Find duplicate files using the given detector"""
-        duplicates = []
-        # Pre-compute all signatures into a dict (addresses Phase 3.8)
-        file_signatures: Dict[str, str] = {}
+                        progress_callback: Optional[Callable] = None,
+                        file_signatures: Optional[Dict[str, str]] = None
+                        ) -> List[Tuple[List[FileInfo], float]]:
+        """Find duplicate files using the given detector.
+
+        file_signatures may be passed in when Phase 1 already ran (see
+        _compute_signatures); files must then be the list it returned.
+        """
         signature_groups: Dict[str, List[FileInfo]] = defaultdict(list)
 
         # Phase 1: Compute all signatures upfront
-        total = len(files)
-        for idx, file_info in enumerate(files):
-            if self.is_stopped or self.is_paused:
-                while self.is_paused and not self.is_stopped:
-                    time.sleep(0.1)  # Sleep to avoid busy-wait CPU consumption
-                if self.is_stopped:
-                    break
-
-            if progress_callback:
-                progress_callback(idx + 1, total)
+        if file_signatures is None:
+            files, file_signatures = self._compute_signatures(
+                files, detector, category, progress_callback
+            )
 
-            sig = detector.compute_signature(file_info.path)
+        for file_info in files:
+            sig = file_signatures.get(file_info.path)
             if sig:
-                file_signatures[file_info.path] = sig
                 signature_groups[sig].append(file_info)
 
         # Phase 2: Find exact matches (same signature)
-        for sig, file_list in signature_groups.items():
-            if len(file_list) > 1:
-                duplicates.append((file_list, 1.0))
-
-        # Phase 3: For fuzzy matches, use prefix-based grouping to reduce O(n^2)
-        if category in ['image', 'video', 'document', 'code']:
-            self._find_similar_pairs_optimized(
-                files, detector, file_signatures, duplicates, progress_callback
-            )
+        duplicates = [(file_list, 1.0) for file_list in signature_groups.values()
+                      if len(file_list) > 1]
 
+        # Exact-hash categories (archives) are done here: there is no
+        # similarity search or pairwise comparison for them at all
+        if category not in self.FUZZY_CATEGORIES:
+            return duplicates
+
+        # Phase 3: For fuzzy matches, use vectorized or bucketed search to avoid O(n^2)
+        self._find_similar_pairs_optimized(
+            files, detector, file_signatures, signature_groups, duplicates, progress_callback
+        )
         return duplicates
 
+    def _compute_signatures_parallel(self, paths: List[str], detector,
+                                     progress_callback: Optional[Callable] = None) -> Dict[str, str]:
+        """Compute signatures in a process pool, reporting progress from this thread"""
+        file_signatures: Dict[str, str] = {}
+        total = len(paths)
+        done = 0
+
+        # Spawn rather than fork: the GUI runs scans from a QThread and forking
+        # a multi-threaded process can deadlock the child
+        executor = ProcessPoolExecutor(
+            max_workers=self.thread_count,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_signature_worker,
+            initargs=(type(detector), detector.worker_kwargs())
+        )
+        try:
+            futures = [
+                executor.submit(_worker_compute_sig, paths[i:i + self.PROCESS_CHUNK_SIZE])
+                for i in range(0, total, self.PROCESS_CHUNK_SIZE)
+            ]
+            for future in as_completed(futures):
+                if self._wait_if_paused():
+                    break
+
+                try:
+                    results = future.result()
+                except Exception as e:
+                    print(f"Error computing signatures in worker: {e}")
+                    continue
+
+                for path, sig in results:
+                    if sig:
+                        file_signatures[path] = sig
+                done += len(results)
+                if progress_callback:
+                    progress_callback(done, total)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        return file_signatures
+
+    @staticmethod
+    def _drop_unique_sizes(files: List[FileInfo]) -> List[FileInfo]:
+        """Keep only files that share their size with at least one other file"""
+        size_counts = Counter(file_info.size for file_info in files)
+        return [file_info for file_info in files if size_counts[file_info.size] > 1]
+
+    def _drop_unique_samples(self, files: List[FileInfo], file_signatures: Dict[str, str],
+                             detector) -> List[FileInfo]:
+        """Drop large files whose sample hash no other file of the same size shares.
+
+        Only size groups with at least one uncached file are sampled; a group
+        whose full hashes are all cached costs nothing to compare. Files
+        that cannot be sampled are kept and left to the full hash.
+        """
+        by_size: Dict[int, List[FileInfo]] = defaultdict(list)
+        for file_info in files:
+            if file_info.size >= self.SAMPLE_HASH_MIN_SIZE:
+                by_size[file_info.size].append(file_info)
+
+        sample_paths = [
+            file_info.path
+            for group in by_size.values()
+            if any(member.path not in file_signatures for member in group)
+            for file_info in group
+        ]
+        if not sample_paths:
+            return files
+
+        samples = detector.compute_signatures_threaded(
+            sample_paths,
+            max_workers=self.thread_count,
+            should_stop=self._wait_if_paused,
+            signature_fn=self._sample_hash
+        )
+        sample_counts = Counter((file_info.size, samples[file_info.path])
+                                for file_info in files if file_info.path in samples)
+        return [file_info for file_info in files
+                if file_info.path not in samples
+                or sample_counts[(file_info.size, samples[file_info.path])] > 1]
+
+    @staticmethod
+    def _sample_hash(path: str) -> Optional[str]:
+        try:
+            return BaseDetector.quick_hash(path)
+        except OSError:
+            return None
+
     def _find_similar_pairs_optimized(self, files: List[FileInfo], detector,
                                       file_signatures: Dict[str, str],
+                                      signature_groups: Dict[str, List[FileInfo]],
                                       duplicates: List,
                                       progress_callback: Optional[Callable] = None):
-        """Find similar duplicates using prefix-based grouping to reduce comparisons.
+        """Find similar (non-identical) duplicates and merge them into groups.
+
+        Candidate pairs come from the detector's vectorized search when it
+        provides one (find_similar_pairs), otherwise from LSH band buckets
+        over the signature to reduce comparisons.
 
         Uses strict grouping: a file can only join a group if it matches ALL
         existing members of that group. No transitive grouping allowed.
         """
-        # Group files by signature prefix for locality-sensitive hashing
-        # Use 8 chars for better discrimination (was 4)
-        prefix_groups: Dict[str, List[FileInfo]] = defaultdict(list)
-        prefix_len = 8
+        # Files with identical signatures were already grouped in Phase 2
+        # (signature_groups), so the search only needs one representative
+        # per distinct signature; its matches are expanded back to every
+        # file sharing it
+        representatives = [members[0] for members in signature_groups.values()]
+
+        if hasattr(detector, 'find_similar_pairs'):
+            representative_pairs = self._vectorized_candidates(
+                representatives, detector, file_signatures, progress_callback
+            )
+        else:
+            representative_pairs = self._band_bucket_candidates(
+                representatives, detector, file_signatures, progress_callback
+            )
 
-        for file_info in files:
-            sig = file_signatures.get(file_info.path)
-            if sig:
-                prefix = sig[:prefix_len] if len(sig) >= prefix_len else sig
-                prefix_groups[prefix].append(file_info)
-
-        processed_pairs = set()
-        total_comparisons = sum(
-            (len(group) * (len(group) - 1)) // 2 for group in prefix_groups.values()
-        )
-        current = 0
+        candidates = [
+            (file1, file2, similarity)
+            for rep1, rep2, similarity in representative_pairs
+            for file1 in signature_groups[file_signatures[rep1.path]]
+            for file2 in signature_groups[file_signatures[rep2.path]]
+        ]
+
+        # Integer ids make group membership a set lookup instead of a list scan
+        file_ids = {file_info.path: idx for idx, file_info in enumerate(files)}
+        group_members = [{file_ids[f.path] for f in group_files_list}
+                         for group_files_list, _ in duplicates]
+
+        # A group can only take a file that matches every member, so it must
+        # contain the file itself or one of its candidate neighbours. Index
+        # groups by member so each pair only checks those groups instead of
+        # scanning every group found so far.
+        neighbors: Dict[int, List[int]] = defaultdict(list)
+        for file1, file2, _ in candidates:
+            id1 = file_ids[file1.path]
+            id2 = file_ids[file2.path]
+            neighbors[id1].append(id2)
+            neighbors[id2].append(id1)
+        file_groups: Dict[int, List[int]] = defaultdict(list)
+        for group_idx, members in enumerate(group_members):
+            for member_id in members:
+                file_groups[member_id].append(group_idx)
+
+        # The same file pairs are re-checked as groups grow, so remember
+        # every comparison made while assembling groups (keyed by the single
+        # int low_id * n + high_id). Only the verdict matters, so detectors
+        # answer with signatures_match(), which compares integer distances
+        # instead of float similarities.
+        pair_matches: Dict[int, bool] = {}
+        n = len(files)
+        signatures_match = detector.signatures_match
+        # Text candidates were scored on the text itself (compare_bulk), so
+        # membership must use the same scorer: the SimHash distance behind
+        # signatures_match() is far stricter, which made groups depend on
+        # the order pairs arrived in
+        text_scored = hasattr(detector, 'compare_bulk')
+        threshold = self.similarity_threshold
+
+        def matches_all(file_id: int, sig: str, group_files_list: List[FileInfo]) -> bool:
+            for member in group_files_list:
+                member_id = file_ids[member.path]
+                key = file_id * n + member_id if file_id < member_id else member_id * n + file_id
+                matched = pair_matches.get(key)
+                if matched is None:
+                    member_sig = file_signatures.get(member.path, '')
+                    if not text_scored:
+                        matched = signatures_match(sig, member_sig)
+                    else:
+                        matched = sig == member_sig or detector.compare_files(
+                            files[file_id].path, member.path
+                        ) >= threshold
+                    pair_matches[key] = matched
+                if not matched:
+                    return False
+            return True
 
         # Build groups with strict matching: every member must match every other member
-        # This prevents transitive false groupings (A~B, B~C does NOT imply A~C)
-        for prefix, group_files in prefix_groups.items():
-            if len(group_files) < 2:
-                continue
+        # This prevents transitive false groupings (A~B, B~C does NOT imply A~C).
+        # Candidates never pair two files with the same signature, and both
+        # sources yield each pair at most once, so no seen-pair bookkeeping
+        # is needed here.
+        for file1, file2, similarity in candidates:
+            if self.is_stopped:
+                return
+
+            sig1 = file_signatures[file1.path]
+            sig2 = file_signatures[file2.path]
+
+            id1 = file_ids[file1.path]
+            id2 = file_ids[file2.path]
+
+            # Try to find an existing group where BOTH files fit
+            # (both must match all existing members), earliest group first
+            added_to_group = False
+            group_indices = set(file_groups[id1])
+            for neighbor_id in neighbors[id1]:
+                group_indices.update(file_groups[neighbor_id])
+
+            for group_idx in sorted(group_indices):
+                group_files_list = duplicates[group_idx][0]
+                members = group_members[group_idx]
+                if id1 in members and id2 in members:
+                    # Both already joined this group through other pairs
+                    added_to_group = True
+                    break
 
-            for i, file1 in enumerate(group_files):
-                if self.is_stopped:
-                    return
+                # Only add if BOTH match all existing members
+                if (matches_all(id1, sig1, group_files_list)
+                        and matches_all(id2, sig2, group_files_list)):
+                    if id1 not in members:
+                        group_files_list.append(file1)
+                        members.add(id1)
+                        file_groups[id1].append(group_idx)
+                    if id2 not in members:
+                        group_files_list.append(file2)
+                        members.add(id2)
+                        file_groups[id2].append(group_idx)
+                    added_to_group = True
+                    break
 
-                sig1 = file_signatures.get(file1.path)
-                if not sig1:
-                    continue
+            # If no suitable group found, create a new pair
+            if not added_to_group:
+                file_groups[id1].append(len(duplicates))
+                file_groups[id2].append(len(duplicates))
+                duplicates.append(([file1, file2], similarity))
+                group_members.append({id1, id2})
 
-                for file2 in group_files[i + 1:]:
-                    if self.is_stopped:
-                        return
+    def _vectorized_candidates(self, files: List[FileInfo], detector,
+                               file_signatures: Dict[str, str],
+                               progress_callback: Optional[Callable] = None):
+        """Yield (file1, file2, similarity) for all pairs above the threshold,
+        found by the detector's vectorized all-pairs search.
 
-                    current += 1
-                    if progress_callback and current % 100 == 0:
-                        progress_callback(current, max(total_comparisons, 1))
+        Every file must have a signature in file_signatures.
+        """
+        pairs = detector.find_similar_pairs(
+            [file_signatures[f.path] for f in files],
+            sizes=[f.size for f in files],
+            progress_callback=progress_callback,
+            should_stop=self._wait_if_paused
+        )
+        for i, j, similarity in pairs:
+            yield files[i], files[j], similarity
+
+    def _band_bucket_candidates(self, files: List[FileInfo], detector,
+                                file_signatures: Dict[str, str],
+                                progress_callback: Optional[Callable] = None):
+        """Yield (file1, file2, similarity) for pairs above the threshold,
+        comparing only files whose signatures collide in an LSH band.
+
+        Text signatures lead with a 64-bit SimHash. Splitting it into
+        LSH_BANDS bands means any two files fewer than LSH_BANDS bits apart
+        share at least one band (pigeonhole), whereas a fixed prefix missed
+        near-duplicates that differed in their first few bits.
+
+        Every file must have a signature in file_signatures, and no two
+        files may share one (callers pass one representative per signature).
+        """
+        sigs = [file_signatures[f.path] for f in files]
+        n = len(files)
 
-                    pair_key = tuple(sorted([file1.path, file2.path]))
-                    if pair_key in processed_pairs:
-                        continue
+        # Near-duplicate clusters usually collide in every band; score each
+        # distinct member set only once
+        buckets = list(dict.fromkeys(self._band_buckets(sigs)))
 
-                    sig2 = file_signatures.get(file2.path)
-                    if not sig2:
-                        continue
+        total_comparisons = sum(
+            (len(members) * (len(members) - 1)) // 2 for members in buckets
+        )
+        current = 0
+        seen_pairs = set()
 
-                    # Skip if already exact match (same signature)
-                    if sig1 == sig2:
+        for members, similarity_matrix in self._score_buckets(detector, files, buckets):
+            for a, i in enumerate(members):
+                if self.is_stopped:
+                    return
+
+                # Progress is reported per row, keeping the inner loop lean
+                current += len(members) - a - 1
+                if progress_callback:
+                    progress_callback(current, max(total_comparisons, 1))
+
+                for b in range(a + 1, len(members)):
+                    # Members are in ascending order, so i < j and i * n + j is unique
+                    j = members[b]
+                    pair = i * n + j
+                    if pair in seen_pairs:
                         continue
+                    seen_pairs.add(pair)
 
-                    similarity = detector.compare_signatures(sig1, sig2)
+                    if similarity_matrix is not None:
+                        similarity = float(similarity_matrix[a, b])
+                    else:
+                        similarity = detector.compare_signatures(sigs[i], sigs[j])
 
                     if similarity >= self.similarity_threshold:
-                        processed_pairs.add(pair_key)
-
-                        # Try to find an existing group where BOTH files fit
-                        # (both must match all existing members)
-                        added_to_group = False
-
-                        for group_files_list, group_sim in duplicates:
-                            if len(group_files_list) == 0:
-                                continue
-
-                            # Check if file1 matches all in group
-                            file1_matches_all = all(
-                                detector.compare_signatures(
-                                    sig1,
-                                    file_signatures.get(f.path, '')
-                                ) >= self.similarity_threshold
-                                for f in group_files_list
-                            )
-
-                            # Check if file2 matches all in group
-                            file2_matches_all = all(
-                                detector.compare_signatures(
-                                    sig2,
-                                    file_signatures.get(f.path, '')
-                                ) >= self.similarity_threshold
-                                for f in group_files_list
-                            )
-
-                            # Only add if BOTH match all existing members
-                            if file1_matches_all and file2_matches_all:
-                                if file1 not in group_files_list:
-                                    group_files_list.append(file1)
-                                if file2 not in group_files_list:
-                                    group_files_list.append(file2)
-                                added_to_group = True
-                                break
-
-                        # If no suitable group found, create a new pair
-                        if not added_to_group:
-                            duplicates.append(([file1, file2], similarity))
+                        yield files[i], files[j], similarity
     
+    def _band_buckets(self, sigs: List[str]) -> List[Tuple[int, ...]]:
+        """Return the indices sharing each LSH band value, for every band
+        value shared by two or more signatures.
+
+        The leading SimHashes are unpacked into one uint64 array; per band,
+        a stable argsort of the band bits lays each bucket out as a
+        contiguous run of ascending indices. Buckets come back ordered by
+        (first member, band).
+        """
+        valid = []
+        simhashes = []
+        for idx, sig in enumerate(sigs):
+            try:
+                simhashes.append(int(sig[:16], 16))
+            except ValueError:
+                continue
+            valid.append(idx)
+        if len(valid) < 2:
+            return []
+        valid = np.array(valid)
+        simhashes = np.array(simhashes, dtype=np.uint64)
+
+        band_bits = self.LSH_BAND_CHARS * 4
+        mask = np.uint64((1 << band_bits) - 1)
+        found = []
+        for band in range(self.LSH_BANDS):
+            keys = (simhashes >> np.uint64(64 - band_bits * (band + 1))) & mask
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            starts = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1])))
+            ends = np.append(starts[1:], len(order))
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                if end - start > 1:
+                    members = valid[order[start:end]].tolist()
+                    found.append((members[0], band, tuple(members)))
+
+        found.sort(key=lambda item: (item[0], item[1]))
+        return [members for _, _, members in found]
+
+    def _score_buckets(self, detector, files: List[FileInfo], buckets: List[Tuple[int, ...]]):
+        """Yield (members, similarity matrix) for each bucket, in order.
+
+        The matrix is None when the detector has no compare_bulk. rapidfuzz
+        releases the GIL, so small buckets are scored concurrently on a thread
+        pool with one core each; large buckets get every core in one call.
+        """
+        if not hasattr(detector, 'compare_bulk'):
+            for members in buckets:
+                yield members, None
+            return
+
+        def score(members, workers):
+            paths = [files[idx].path for idx in members]
+            return detector.compare_bulk(paths, paths, workers=workers)
+
+        # Score a bounded window of buckets ahead of the consumer
+        window = self.thread_count * 4
+        with ThreadPoolExecutor(max_workers=self.thread_count) as executor:
+            for start in range(0, len(buckets), window):
+                if self._wait_if_paused():
+                    return
+                chunk = buckets[start:start + window]
+                futures = [
+                    executor.submit(score, members, 1)
+                    if len(members) < self.INLINE_SCORE_MIN_SIZE else None
+                    for members in chunk
+                ]
+                for members, future in zip(chunk, futures):
+                    matrix = future.result() if future else score(members, -1)
+                    yield members, matrix
+
+    def _wait_if_paused(self) -> bool:
+        """Block while the scan is paused. Returns True if the scan was stopped."""
+        # stop() also sets the event, so a paused scan wakes up to exit
+        self._resume_event.wait()
+        return self.is_stopped
+
     def pause(self):
         """Pause the scan"""
-        self.is_paused = True
+        self._resume_event.clear()
     
     def resume(self):
         """Resume the scan"""
-        self.is_paused = False
+        self._resume_event.set()
     
     def stop(self):
         """Stop the scan"""
         self.is_stopped = True
-        self.is_paused = False
+        self._resume_event.set()
@@ -2,73 +2,230 @@
 Video duplicate detector using frame sampling and perceptual hashing.
 """
 import os
-from typing import Optional, List
+from collections import defaultdict
+from typing import Optional, List, Dict, Tuple, Callable
 import cv2
-import imagehash
-from PIL import Image
 import numpy as np
 from .base import BaseDetector
+from .bktree import BKTree
+from .image_detector import _popcount
+
+# Optional: PyAV decodes and scales frames without a full-size BGR copy
+try:
+    import av
+    AV_AVAILABLE = True
+except ImportError:
+    AV_AVAILABLE = False
 
 
 class VideoDetector(BaseDetector):
     """Detect duplicate videos using frame sampling"""
+
+    # Sampled frames closer than this are reached by grabbing through the
+    # stream; further apart, a seek (keyframe + decode forward) is cheaper
+    MAX_GRAB_GAP = 250
+
+    # Bumped whenever frame hashing changes, so cached signatures from
+    # earlier versions are not compared against new ones
+    SIGNATURE_VERSION = 4
+
+    # Frame-count groups at least this large use per-frame BK-trees instead
+    # of the all-pairs matrix
+    BKTREE_MIN_SIZE = 20000
     
     def __init__(self, similarity_threshold: float = 0.95, sample_frames: int = 10):
         super().__init__(similarity_threshold)
         self.sample_frames = sample_frames
         self.cache = {}
+        # Parsed frame hashes per signature; group assembly compares the
+        # same signatures many times
+        self.int_cache: Dict[str, Tuple[int, ...]] = {}
+        # Signature -> (frames,) uint64 array for the vectorized search
+        self.packed_cache: Dict[str, np.ndarray] = {}
+        # Summed frame-hash distance allowed for a full sample_frames signature
+        self.max_signature_distance = self.max_hamming_distance(64 * sample_frames)
+
+    def compute_signatures_bulk(self, paths: List[str], max_workers: Optional[int] = None,
+                                progress_callback: Optional[Callable] = None,
+                                should_stop: Optional[Callable] = None) -> Dict[str, str]:
+        """Sample many videos concurrently.
+
+        OpenCV releases the GIL while seeking and decoding frames, so threads
+        parallelize without the startup and pickling cost of processes.
+        FFmpeg would otherwise start one decoder thread per core for every
+        open capture, so the cores are split between the concurrent videos.
+        """
+        workers = max_workers or os.cpu_count() or 1
+        decoder_threads = max(1, (os.cpu_count() or 1) // workers)
+        return self.compute_signatures_threaded(
+            paths, workers, progress_callback, should_stop,
+            signature_fn=lambda path: self.compute_signature(path, decoder_threads)
+        )
+
+    def worker_kwargs(self) -> Dict:
+        return {'similarity_threshold': self.similarity_threshold,
+                'sample_frames': self.sample_frames}
+
+    def signature_cache_key(self) -> str:
+        # The two decoding paths scale frames differently. Each signature
+        # also names the backend that produced it (see compute_signature), so
+        # OpenCV fallbacks are never compared against PyAV signatures.
+        backend = 'av' if AV_AVAILABLE else 'cv2'
+        return f"{type(self).__name__}:{self.sample_frames}:v{self.SIGNATURE_VERSION}:{backend}"
+
+    def _frame_indices(self, total_frames: int) -> List[int]:
+        """Indices of the frames to sample, spread evenly over the video"""
+        if total_frames <= self.sample_frames:
+            return list(range(total_frames))
+        return [int(i * total_frames / self.sample_frames) for i in range(self.sample_frames)]
     
-    def compute_signature(self, file_path: str) -> Optional[str]:
+    def compute_signature(self, file_path: str, decoder_threads: int = 0) -> Optional[str]:
         """Compute signature from video frames - memory efficient version.
-        Processes frames one at a time to avoid storing all frames in memory."""
+        Processes frames one at a time to avoid storing all frames in memory.
+
+        decoder_threads caps FFmpeg's decoding threads for this capture
+        (0 lets the decoder choose).
+
+        The signature is "<backend>:" followed by the frame hashes joined by
+        '|', where backend is 'av' or 'cv2'."""
         if file_path in self.cache:
             return self.cache[file_path]
 
         try:
-            cap = cv2.VideoCapture(file_path)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-            if total_frames == 0:
-                cap.release()
-                return None
-
-            # Calculate frame indices to sample
-            if total_frames <= self.sample_frames:
-                frame_indices = list(range(total_frames))
-            else:
-                frame_indices = [
-                    int(i * total_frames / self.sample_frames)
-                    for i in range(self.sample_frames)
-                ]
-
-            # Process frames one at a time to reduce memory usage
             hashes = []
-            for idx in frame_indices:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-                ret, frame = cap.read()
-                if ret:
-                    # Convert BGR to RGB and compute hash immediately
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    pil_img = Image.fromarray(rgb_frame)
-                    frame_hash = imagehash.average_hash(pil_img, hash_size=8)
-                    hashes.append(str(frame_hash))
-                    # Delete frame data to free memory before next iteration
-                    del frame
-                    del rgb_frame
-                    del pil_img
-
-            cap.release()
+            backend = 'av'
+            if AV_AVAILABLE:
+                try:
+                    hashes = self._sample_hashes_av(file_path, decoder_threads)
+                except av.FFmpegError:
+                    pass
+            if not hashes:
+                # OpenCV may still manage files PyAV could not read
+                backend = 'cv2'
+                hashes = self._sample_hashes_cv2(file_path, decoder_threads)
 
             if not hashes:
                 return None
 
-            signature = '|'.join(hashes)
+            signature = f"{backend}:{'|'.join(hashes)}"
             self.cache[file_path] = signature
             return signature
         except Exception as e:
             print(f"Error computing signature for {file_path}: {e}")
             return None
+
+    def _sample_hashes_av(self, file_path: str, decoder_threads: int) -> List[str]:
+        """Hash the sampled frames with PyAV.
+
+        libswscale converts each sampled frame straight from the decoder's
+        YUV planes to a 9x8 gray image, so no full-resolution RGB/BGR copy
+        is ever made. Nearby samples are reached by decoding forward, far
+        ones by seeking.
+        """
+        with av.open(file_path) as container:
+            if not container.streams.video:
+                return []
+            stream = container.streams.video[0]
+            stream.thread_type = 'AUTO'
+            if decoder_threads > 0:
+                stream.codec_context.thread_count = decoder_threads
+
+            rate = stream.average_rate or stream.guessed_rate
+            if not rate:
+                return []
+            total_frames = stream.frames
+            if not total_frames and container.duration:
+                # Some containers (MKV, WebM) do not store a frame count
+                total_frames = int(container.duration / av.time_base * rate)
+            if not total_frames:
+                return []
+
+            time_base = stream.time_base
+            start = stream.start_time or 0
+            hashes = []
+            frames = None
+            position = 0  # index of the frame the decoder yields next
+            for idx in self._frame_indices(total_frames):
+                if frames is None and idx <= self.MAX_GRAB_GAP:
+                    frames = container.decode(stream)
+                elif frames is None or idx - position > self.MAX_GRAB_GAP:
+                    # Lands on the keyframe at or before the target
+                    container.seek(start + int(idx / rate / time_base), stream=stream)
+                    frames = container.decode(stream)
+
+                for frame in frames:
+                    if frame.pts is not None:
+                        position = round((frame.pts - start) * time_base * rate) + 1
+                    else:
+                        position += 1
+                    if position > idx:
+                        break
+                else:
+                    break  # stream ended before this sample
+
+                small = frame.reformat(width=9, height=8, format='gray',
+                                       interpolation='AREA').to_ndarray()
+                hashes.append(self._dhash(small))
+            return hashes
+
+    def _sample_hashes_cv2(self, file_path: str, decoder_threads: int) -> List[str]:
+        """Hash the sampled frames with OpenCV"""
+        cap = self._open_capture(file_path, decoder_threads)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        # Process frames one at a time to reduce memory usage
+        hashes = []
+        position = 0  # index of the frame the next read() returns
+        try:
+            for idx in self._frame_indices(total_frames):
+                if idx - position > self.MAX_GRAB_GAP:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+                else:
+                    # grab() skips the colour conversion and copy of frames
+                    # we do not hash, and avoids re-decoding from a keyframe
+                    while position < idx and cap.grab():
+                        position += 1
+                ret, frame = cap.read()
+                position = idx + 1
+                if ret:
+                    hashes.append(self._frame_hash(frame))
+        finally:
+            cap.release()
+        return hashes
     
+    @staticmethod
+    def _open_capture(file_path: str, decoder_threads: int = 0):
+        """Open a capture on the FFmpeg backend with hardware decoding
+        allowed; OpenCV falls back to software decoding when no device is
+        available. Files FFmpeg cannot open go to the default backend."""
+        params = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        if decoder_threads > 0:
+            params += [cv2.CAP_PROP_N_THREADS, decoder_threads]
+        cap = cv2.VideoCapture(file_path, cv2.CAP_FFMPEG, params)
+        if cap.isOpened():
+            return cap
+        cap.release()
+        return cv2.VideoCapture(file_path)
+
+    @staticmethod
+    def _frame_hash(frame: np.ndarray) -> str:
+        """64-bit difference hash of a BGR frame, as 16 hex digits.
+
+        The full frame is area-averaged straight down to 9x8 before the
+        grayscale conversion, so only one pass touches full-resolution
+        pixels.
+        """
+        small = cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA)
+        return VideoDetector._dhash(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY))
+
+    @staticmethod
+    def _dhash(gray: np.ndarray) -> str:
+        """Difference hash of a 9x8 grayscale image: one bit per pair of
+        horizontal neighbours, set where brightness rises to the right.
+        Bits are packed row-major, most significant first, the same layout
+        as imagehash.dhash."""
+        return np.packbits(gray[:, 1:] > gray[:, :-1]).tobytes().hex()
+
     def compare_files(self, file1: str, file2: str) -> float:
         """Compare two videos based on frame hashes"""
         sig1 = self.compute_signature(file1)
@@ -79,28 +236,178 @@ class VideoDetector(BaseDetector):
 
         return self.compare_signatures(sig1, sig2)
 
+    @staticmethod
+    def _backend(sig: str) -> str:
+        """Decoding backend named at the start of a signature"""
+        return sig.partition(':')[0]
+
+    def pack_signature(self, sig: str) -> Optional[np.ndarray]:
+        """Parse a signature once into a (frames,) uint64 array (cached)"""
+        packed = self.packed_cache.get(sig)
+        if packed is None:
+            # Every frame hash is 16 hex digits, joined by '|'
+            hashes = sig.partition(':')[2]
+            if (len(hashes) + 1) % 17:
+                return None
+            try:
+                packed = np.frombuffer(bytes.fromhex(hashes.replace('|', '')), dtype='>u8')
+            except ValueError:
+                return None
+            packed = packed.astype(np.uint64)
+            self.packed_cache[sig] = packed
+        return packed
+
+    def frame_ints(self, sig: str) -> Optional[Tuple[int, ...]]:
+        """Parse a signature once into one Python int per frame hash (cached).
+        Python ints beat numpy for a single pair: XOR + bit_count with no
+        per-call array overhead."""
+        ints = self.int_cache.get(sig)
+        if ints is None:
+            packed = self.pack_signature(sig)
+            if packed is None:
+                return None
+            ints = tuple(packed.tolist())
+            self.int_cache[sig] = ints
+        return ints
+
     def compare_signatures(self, sig1: str, sig2: str) -> float:
         """Compare two pre-computed video signatures (pipe-separated frame hashes)"""
-        try:
-            hashes1 = sig1.split('|')
-            hashes2 = sig2.split('|')
-
-            # Videos must have same number of sampled frames
-            if len(hashes1) != len(hashes2):
-                return 0.0
-
-            # Calculate average similarity across all frame pairs
-            similarities = []
-            for h1, h2 in zip(hashes1, hashes2):
-                hash1_obj = imagehash.hex_to_hash(h1)
-                hash2_obj = imagehash.hex_to_hash(h2)
-                distance = hash1_obj - hash2_obj
-                similarity = 1.0 - (distance / 64.0)  # hash_size=8 -> max_distance=64
-                similarities.append(similarity)
-
-            return sum(similarities) / len(similarities) if similarities else 0.0
-        except Exception:
+        # Frames scaled by different backends are not comparable
+        if self._backend(sig1) != self._backend(sig2):
+            return 0.0
+
+        hashes1 = self.frame_ints(sig1)
+        hashes2 = self.frame_ints(sig2)
+
+        # Videos must have same number of sampled frames
+        if not hashes1 or not hashes2 or len(hashes1) != len(hashes2):
             return 0.0
+
+        # Average similarity across all frame pairs; hash_size=8 -> 64 bits per frame
+        distance = sum((h1 ^ h2).bit_count() for h1, h2 in zip(hashes1, hashes2))
+        return 1.0 - distance / (64.0 * len(hashes1))
+
+    def signatures_match(self, sig1: str, sig2: str) -> bool:
+        """Integer-distance form of compare_signatures() >= threshold"""
+        if self._backend(sig1) != self._backend(sig2):
+            return False
+        hashes1 = self.frame_ints(sig1)
+        hashes2 = self.frame_ints(sig2)
+        if not hashes1 or not hashes2 or len(hashes1) != len(hashes2):
+            return False
+        if len(hashes1) == self.sample_frames:
+            limit = self.max_signature_distance
+        else:
+            limit = self.max_hamming_distance(64 * len(hashes1))
+        # Most pairs checked here are not duplicates, so stop as soon as
+        # the running distance is over budget
+        distance = 0
+        for h1, h2 in zip(hashes1, hashes2):
+            distance += (h1 ^ h2).bit_count()
+            if distance > limit:
+                return False
+        return True
+
+    def find_similar_pairs(self, signatures: List[str], sizes: Optional[List[int]] = None,
+                           progress_callback: Optional[Callable] = None,
+                           should_stop: Optional[Callable] = None) -> List[Tuple[int, int, float]]:
+        """Find all pairs of signatures whose similarity meets the threshold.
+
+        Signatures with the same backend and frame count are stacked into an (N, frames)
+        uint64 matrix and compared all-pairs with XOR + popcount. Groups of
+        BKTREE_MIN_SIZE or more use a BK-tree search so the work does not
+        grow quadratically.
+
+        Args:
+            signatures: Signatures from compute_signature
+            sizes: Unused; re-encoded videos differ too much in size to filter on
+            progress_callback: Optional callback(done, total)
+            should_stop: Optional callable; returning True aborts the search
+
+        Returns:
+            List of (i, j, similarity) with i < j, indexing into signatures
+        """
+        by_frames: Dict[Tuple[str, int], List[int]] = defaultdict(list)
+        rows: Dict[int, np.ndarray] = {}
+        for idx, sig in enumerate(signatures):
+            packed = self.pack_signature(sig)
+            if packed is None or not len(packed):
+                continue
+            rows[idx] = packed
+            by_frames[self._backend(sig), len(packed)].append(idx)
+
+        pairs = []
+        total = len(rows)
+        done = 0
+        for (_, frames), indices in by_frames.items():
+            # similarity >= threshold  <=>  summed distance <= max_total
+            max_total = self.max_hamming_distance(64 * frames)
+            if len(indices) >= self.BKTREE_MIN_SIZE:
+                if not self._pairs_bktree(rows, indices, frames, max_total, pairs, should_stop):
+                    return pairs
+                done += len(indices)
+                if progress_callback:
+                    progress_callback(done, total)
+                continue
+
+            # One contiguous row per frame position, so each frame's XOR +
+            # popcount runs over a flat (rows, n) block and is summed in place
+            # rather than materializing a (rows, n, frames) intermediate
+            columns = np.stack([rows[idx] for idx in indices], axis=1)
+            n = len(indices)
+            block_rows = max(1, (64 * 1024 * 1024) // (8 * n))
+            # Summed distances are at most 64 * frames
+            sum_dtype = np.uint16 if 64 * frames <= np.iinfo(np.uint16).max else np.uint32
+
+            for start in range(0, n - 1, block_rows):
+                if should_stop and should_stop():
+                    return pairs
+                stop = min(start + block_rows, n - 1)
+                distances = np.zeros((stop - start, n - start - 1), dtype=sum_dtype)
+                for column in columns:
+                    distances += _popcount(column[start:stop, None] ^ column[None, start + 1:])
+                # Column c is row start + 1 + c, so c >= r keeps pairs with j > i
+                matches = distances <= max_total
+                matches &= np.arange(n - start - 1)[None, :] >= np.arange(stop - start)[:, None]
+                for row, col in zip(*np.nonzero(matches)):
+                    distance = int(distances[row, col])
+                    pairs.append((indices[start + row], indices[start + 1 + col],
+                                  1.0 - distance / (64.0 * frames)))
+
+            done += n
+            if progress_callback:
+                progress_callback(done, total)
+
+        return pairs
+
+    def _pairs_bktree(self, rows, indices, frames, max_total, pairs, should_stop) -> bool:
+        """BK-tree search with one tree per frame position.
+
+        If the summed distance over all frames is within max_total, at least
+        one frame is within max_total // frames (pigeonhole), so querying
+        every frame's tree at that radius yields a superset of the matches;
+        the candidates are then verified on the full sum. Appends to pairs
+        and returns False if should_stop aborted the search.
+        """
+        radius = max_total // frames
+        trees = [BKTree() for _ in range(frames)]
+        for done, idx in enumerate(indices, 1):
+            if should_stop and done % 1000 == 0 and should_stop():
+                return False
+
+            ints = rows[idx].tolist()
+            # The trees only hold earlier files, so each pair is found once
+            candidates = set()
+            for tree, key in zip(trees, ints):
+                candidates.update(other for other, _ in tree.query(key, radius))
+            for other in sorted(candidates):
+                other_ints = rows[other].tolist()
+                distance = sum((a ^ b).bit_count() for a, b in zip(ints, other_ints))
+                if distance <= max_total:
+                    pairs.append((other, idx, 1.0 - distance / (64.0 * frames)))
+            for tree, key in zip(trees, ints):
+                tree.add(key, idx)
+        return True
     
     def create_thumbnail(self, file_path: str, output_path: str, size: tuple = (200, 200)):
         """Create a thumbnail from video's first frame"""
@@ -112,11 +419,21 @@ class VideoDetector(BaseDetector):
             if not ret:
                 return False
             
-            # Convert BGR to RGB
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            pil_img = Image.fromarray(rgb_frame)
-            pil_img.thumbnail(size, Image.Resampling.LANCZOS)
-            pil_img.save(output_path, 'JPEG', quality=85)
+            # Resize and encode entirely in OpenCV: the BGR frame goes
+            # straight to JPEG with no RGB copy or PIL round-trip
+            height, width = frame.shape[:2]
+            scale = min(size[0] / width, size[1] / height)
+            if scale < 1:
+                frame = cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                                   interpolation=cv2.INTER_AREA)
+
+            ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+            if not ok:
+                return False
+            # imencode + a Python write also handles non-ASCII paths,
+            # which cv2.imwrite does not on Windows
+            with open(output_path, 'wb') as f:
+                f.write(encoded.tobytes())
             return True
         except Exception as e:
             print(f"Error creating thumbnail for {file_path}: {e}")
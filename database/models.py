@@ -1,11 +1,15 @@
 """
 Database models for the deduplicator application.
 """
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, Index
+from sqlalchemy import (
+    create_engine, bindparam, event, inspect, Column, Integer, String, Float, DateTime, ForeignKey, Boolean, Text, Index
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
+from contextlib import contextmanager
 from datetime import datetime
 import os
+import time
 
 Base = declarative_base()
 
@@ -44,6 +48,8 @@ class DuplicateGroup(Base):
     __tablename__ = 'duplicate_groups'
     __table_args__ = (
         Index('idx_duplicate_groups_session_id', 'session_id'),
+        # Results view: a session's groups by descending similarity
+        Index('idx_duplicate_groups_session_similarity', 'session_id', 'similarity_score'),
     )
 
     id = Column(Integer, primary_key=True)
@@ -61,6 +67,7 @@ class FileEntry(Base):
     __tablename__ = 'file_entries'
     __table_args__ = (
         Index('idx_file_entries_group_id', 'group_id'),
+        Index('idx_file_entries_content_xxh128', 'content_xxh128'),
     )
 
     id = Column(Integer, primary_key=True)
@@ -71,10 +78,23 @@ class FileEntry(Base):
     thumbnail_path = Column(Text, nullable=True)  # For images/videos
     file_metadata = Column(Text, nullable=True)  # JSON string for additional info
     marked_for_deletion = Column(Boolean, default=False)
+    content_xxh128 = Column(String(32), nullable=True)  # XXH3-128 hex digest of the content
 
     group = relationship('DuplicateGroup', back_populates='files')
 
 
+class SignatureCache(Base):
+    """Detector signatures of scanned files, reused while mtime and size are unchanged"""
+    __tablename__ = 'hash_cache'
+
+    path = Column(Text, primary_key=True)
+    detector = Column(String(100), primary_key=True)  # Detector name + parameters
+    mtime = Column(Float)
+    size = Column(Integer)
+    signature = Column(Text)
+    last_seen = Column(Float)  # Unix time of the last scan that used this row
+
+
 class SortingSession(Base):
     """Represents an auto-sorting operation"""
     __tablename__ = 'sorting_sessions'
@@ -89,6 +109,23 @@ class SortingSession(Base):
     status = Column(String(50), default='pending')
 
 
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Per-connection SQLite settings.
+
+    WAL lets readers (the results view, signature-cache lookups) run while
+    a scan is writing; synchronous=NORMAL skips an fsync per commit and in
+    WAL mode can only lose the last commits on power loss, not corrupt.
+    auto_vacuum=INCREMENTAL only takes effect on a database with no tables
+    yet (or at its next VACUUM); it lets free pages be returned in small
+    steps instead of rewriting the whole file.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.close()
+
+
 class Database:
     """Database handler"""
     
@@ -97,41 +134,249 @@ class Database:
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         
         self.engine = create_engine(f'sqlite:///{db_path}')
+        event.listen(self.engine, 'connect', _set_sqlite_pragmas)
         Base.metadata.create_all(self.engine)
-        self.Session = sessionmaker(bind=self.engine)
+        # create_all skips the columns and indexes of tables that already
+        # exist, so add any introduced after the database was first created
+        self._add_missing_columns()
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(self.engine, checkfirst=True)
+        # Objects stay readable after commit without a reload query
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
     
+    def _add_missing_columns(self):
+        """ALTER TABLE ADD COLUMN for model columns an older database lacks"""
+        inspector = inspect(self.engine)
+        with self.engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                existing = {column['name'] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in existing:
+                        column_type = column.type.compile(dialect=self.engine.dialect)
+                        connection.exec_driver_sql(
+                            f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                        )
+
     def get_session(self):
         """Get a new database session"""
         return self.Session()
-    
-    def create_scan_session(self, name, file_types, similarity_threshold=0.95):
-        """Create a new scan session"""
+
+    @contextmanager
+    def session_scope(self, session=None):
+        """Yield a session and commit when the block exits.
+
+        If an open session is passed in it is yielded as-is and the caller
+        stays responsible for committing it, so helpers can either run on
+        their own or join a larger transaction.
+        """
+        if session is not None:
+            yield session
+            return
         session = self.get_session()
-        scan_session = ScanSession(
-            name=name,
-            file_types=file_types,
-            similarity_threshold=similarity_threshold
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
+    def create_scan_session(self, name, file_types, similarity_threshold=0.95, session=None):
+        """Create a new scan session and return its id"""
+        with self.session_scope(session) as session:
+            scan_session = ScanSession(
+                name=name,
+                file_types=file_types,
+                similarity_threshold=similarity_threshold
+            )
+            session.add(scan_session)
+            session.flush()
+            return scan_session.id
+    
+    def bulk_insert_groups(self, groups, session):
+        """Insert many DuplicateGroup rows at once and return their ids.
+
+        Args:
+            groups: List of dicts keyed by DuplicateGroup column names
+            session: Open session; the caller commits
+
+        Returns:
+            New group ids, in the same order as groups
+        """
+        if not groups:
+            return []
+        table = DuplicateGroup.__table__
+        result = session.execute(
+            table.insert().returning(table.c.id, sort_by_parameter_order=True), groups
         )
-        session.add(scan_session)
-        session.commit()
-        session_id = scan_session.id
-        session.close()
-        return session_id
+        return result.scalars().all()
+
+    def bulk_insert_files(self, entries, session=None):
+        """Insert many FileEntry rows with a single executemany.
+
+        Args:
+            entries: List of dicts keyed by FileEntry column names
+            session: Optional open session; if given, the caller commits
+        """
+        if not entries:
+            return
+        if session is not None:
+            session.execute(FileEntry.__table__.insert(), entries)
+            return
+
+        session = self.get_session()
+        try:
+            session.execute(FileEntry.__table__.insert(), entries)
+            session.commit()
+        finally:
+            session.close()
     
-    def get_scan_session(self, session_id):
-        """Get a scan session by ID"""
+    def delete_file_entries(self, entry_ids):
+        """Delete FileEntry rows by id in one transaction.
+
+        Args:
+            entry_ids: Iterable of FileEntry ids
+        """
+        entry_ids = list(entry_ids)
+        if not entry_ids:
+            return
+        table = FileEntry.__table__
+        session = self.get_session()
+        try:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(entry_ids), 500):
+                chunk = entry_ids[start:start + 500]
+                session.execute(table.delete().where(table.c.id.in_(chunk)))
+            session.commit()
+        finally:
+            session.close()
+
+    def set_content_hashes(self, hashes):
+        """Record content hashes computed after the scan.
+
+        Args:
+            hashes: Dict of FileEntry id -> XXH3-128 hex digest
+        """
+        if not hashes:
+            return
+        table = FileEntry.__table__
         session = self.get_session()
-        scan_session = session.query(ScanSession).filter_by(id=session_id).first()
-        session.close()
-        return scan_session
+        try:
+            session.execute(
+                table.update()
+                .where(table.c.id == bindparam('entry_id'))
+                .values(content_xxh128=bindparam('digest')),
+                [{'entry_id': entry_id, 'digest': digest} for entry_id, digest in hashes.items()]
+            )
+            session.commit()
+        finally:
+            session.close()
+
+    def get_cached_signatures(self, detector, file_stats):
+        """Look up cached signatures for files whose mtime and size still match.
+
+        Args:
+            detector: Detector cache key (see BaseDetector.signature_cache_key)
+            file_stats: Dict of path -> (mtime, size)
+
+        Returns:
+            Dict of path -> signature for cache hits
+        """
+        table = SignatureCache.__table__
+        paths = list(file_stats)
+        hits = {}
+        session = self.get_session()
+        try:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(paths), 500):
+                rows = session.execute(
+                    table.select()
+                    .with_only_columns(table.c.path, table.c.mtime, table.c.size, table.c.signature)
+                    .where(table.c.detector == detector)
+                    .where(table.c.path.in_(paths[start:start + 500]))
+                )
+                for path, mtime, size, signature in rows:
+                    if file_stats[path] == (mtime, size):
+                        hits[path] = signature
+
+            # Refresh hits so prune_signature_cache keeps rows still in use
+            if hits:
+                session.execute(
+                    table.update()
+                    .where(table.c.path == bindparam('hit_path'))
+                    .where(table.c.detector == detector)
+                    .values(last_seen=time.time()),
+                    [{'hit_path': path} for path in hits]
+                )
+                session.commit()
+        finally:
+            session.close()
+        return hits
+
+    def store_signatures(self, detector, rows):
+        """Insert or replace cached signatures.
+
+        Args:
+            detector: Detector cache key
+            rows: Iterable of (path, mtime, size, signature)
+        """
+        now = time.time()
+        entries = [
+            {'path': path, 'detector': detector, 'mtime': mtime, 'size': size,
+             'signature': signature, 'last_seen': now}
+            for path, mtime, size, signature in rows
+        ]
+        if not entries:
+            return
+        session = self.get_session()
+        try:
+            session.execute(SignatureCache.__table__.insert().prefix_with('OR REPLACE'), entries)
+            session.commit()
+        finally:
+            session.close()
     
-    def update_session_status(self, session_id, status):
-        """Update session status"""
+    def prune_signature_cache(self, max_age_days=90):
+        """Delete cached signatures no scan has used for max_age_days"""
+        table = SignatureCache.__table__
+        cutoff = time.time() - max_age_days * 86400
         session = self.get_session()
-        scan_session = session.query(ScanSession).filter_by(id=session_id).first()
-        if scan_session:
-            scan_session.status = status
-            if status == 'completed':
-                scan_session.completed_at = datetime.now()
+        try:
+            session.execute(table.delete().where(table.c.last_seen < cutoff))
             session.commit()
-        session.close()
+        finally:
+            session.close()
+    
+    def optimize(self):
+        """Checkpoint the WAL, return free pages to the OS and refresh the
+        query planner statistics.
+
+        A database created before incremental auto-vacuum was enabled gets
+        one full VACUUM to switch it over; after that only the free pages
+        are released, without rewriting the file.
+        """
+        with self.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+            auto_vacuum = connection.exec_driver_sql('PRAGMA auto_vacuum').scalar()
+            if auto_vacuum == 2:  # INCREMENTAL
+                connection.exec_driver_sql('PRAGMA incremental_vacuum')
+            else:
+                connection.exec_driver_sql('VACUUM')
+            connection.exec_driver_sql('PRAGMA optimize')
+
+    def get_scan_session(self, session_id):
+        """Get a scan session by ID"""
+        with self.session_scope() as session:
+            return session.get(ScanSession, session_id)
+    
+    def update_session_status(self, session_id, status, session=None):
+        """Update session status (within session's transaction, if given)"""
+        with self.session_scope(session) as session:
+            # Primary-key lookup; served from the identity map when the
+            # session already holds this scan session
+            scan_session = session.get(ScanSession, session_id)
+            if scan_session:
+                scan_session.status = status
+                if status == 'completed':
+                    scan_session.completed_at = datetime.now()
@@ -33,6 +33,31 @@ class SorterThread(QThread):
         self.finished.emit(stats)
 
 
+class CategorizerThread(QThread):
+    """Background thread for ML image categorization"""
+    progress = pyqtSignal(int, int, str)  # current, total, filepath
+    finished = pyqtSignal(str)  # error message, empty on success
+
+    def __init__(self, categorizer, folder):
+        super().__init__()
+        self.categorizer = categorizer
+        self.folder = folder
+
+    def run(self):
+        """Categorize the folder, then move images into category subfolders"""
+        try:
+            categorized = self.categorizer.categorize_folder(
+                self.folder,
+                progress_callback=self.progress.emit
+            )
+            if not self.categorizer.is_stopped:
+                self.categorizer.sort_by_category(categorized, self.folder)
+        except Exception as e:
+            self.finished.emit(str(e))
+            return
+        self.finished.emit('')
+
+
 class AutoSorterTab(QWidget):
     """Tab for auto-sorting files"""
 
@@ -41,19 +66,25 @@ class AutoSorterTab(QWidget):
         self.db = db
         self.sorter = None
         self.sorter_thread = None
+        self.categorizer_thread = None
         self.init_ui()
 
     def cleanup_thread(self):
         """Properly clean up the sorter thread to prevent memory leaks"""
         if self.sorter_thread is not None:
             if self.sorter_thread.isRunning():
-                self.sorter_thread.quit()
-                self.sorter_thread.wait(5000)  # Wait up to 5 seconds
-                if self.sorter_thread.isRunning():
-                    self.sorter_thread.terminate()
-                    self.sorter_thread.wait(1000)
+                # run() never enters an event loop, so quit() would do
+                # nothing; the sorter checks its stop flag between files
+                if self.sorter:
+                    self.sorter.stop()
+                self.sorter_thread.wait()
             self.sorter_thread = None
             self.sorter = None
+        if self.categorizer_thread is not None:
+            if self.categorizer_thread.isRunning():
+                self.categorizer_thread.categorizer.stop()
+                self.categorizer_thread.wait()
+            self.categorizer_thread = None
     
     def init_ui(self):
         """Initialize the UI"""
@@ -222,25 +253,28 @@ class AutoSorterTab(QWidget):
         if not os.path.exists(images_folder):
             return
         
-        try:
-            categorizer = MLImageCategorizer()
-            self.status_label.setText("Running ML categorization on images...")
-            
-            categorized = categorizer.categorize_folder(
-                images_folder,
-                progress_callback=lambda cur, tot, path: self.update_progress(cur, tot, path)
-            )
-            
-            categorizer.sort_by_category(categorized, images_folder)
-            
-            self.status_label.setText("ML categorization complete!")
-            QMessageBox.information(
-                self, "Complete", 
-                "Sorting and ML categorization complete!"
-            )
-        except Exception as e:
+        self.start_sort_btn.setEnabled(False)
+        self.status_label.setText("Running ML categorization on images...")
+
+        # Each image is a round trip to Ollama; keep the window responsive
+        self.categorizer_thread = CategorizerThread(MLImageCategorizer(), images_folder)
+        self.categorizer_thread.progress.connect(self.update_progress)
+        self.categorizer_thread.finished.connect(self.categorization_finished)
+        self.categorizer_thread.start()
+
+    def categorization_finished(self, error):
+        """Handle ML categorization completion"""
+        self.start_sort_btn.setEnabled(True)
+        if error:
             QMessageBox.warning(
                 self, "ML Error",
-                f"ML categorization failed: {str(e)}\n\n"
+                f"ML categorization failed: {error}\n\n"
                 "Make sure Ollama is running with a vision model (e.g., llava)"
             )
+            return
+
+        self.status_label.setText("ML categorization complete!")
+        QMessageBox.information(
+            self, "Complete", 
+            "Sorting and ML categorization complete!"
+        )
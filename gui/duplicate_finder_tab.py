@@ -7,14 +7,13 @@ from PyQt6.QtWidgets import (
     QFileDialog, QListWidgetItem, QMessageBox, QSplitter,
     QScrollArea, QDoubleSpinBox
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt6.QtGui import QPixmap
 import json
 import os
+import time
 
 from database import Database
-from core import DuplicateScanner
-from .results_viewer import ResultsViewer
 from .settings_tab import load_app_settings
 
 
@@ -24,20 +23,39 @@ class ScannerThread(QThread):
     status = pyqtSignal(str)
     finished = pyqtSignal()
     
+    # Minimum seconds between forwarded progress updates
+    PROGRESS_INTERVAL = 0.05
+    
     def __init__(self, scanner, paths):
         super().__init__()
         self.scanner = scanner
         self.paths = paths
+        self._last_emit_t = 0.0
+        self._last_emit_i = -1
     
     def run(self):
         """Run the scan"""
         self.scanner.scan_paths(
             self.paths,
-            progress_callback=self.progress.emit,
+            progress_callback=self._on_progress,
             status_callback=self.status.emit
         )
         self.finished.emit()
 
+    def _on_progress(self, current, total, message):
+        """Coalesce per-file progress into a few queued signals per second.
+
+        Each emit crosses to the GUI thread and repaints the progress bar,
+        so only completion, a 0.1% step or PROGRESS_INTERVAL elapsed are
+        forwarded. Status messages are rare and always forwarded.
+        """
+        now = time.monotonic()
+        if (current == total or current - self._last_emit_i >= max(1, total // 1000)
+                or now - self._last_emit_t > self.PROGRESS_INTERVAL):
+            self.progress.emit(current, total, message)
+            self._last_emit_t = now
+            self._last_emit_i = current
+
 
 class DuplicateFinderTab(QWidget):
     """Tab for finding duplicate files"""
@@ -167,6 +185,14 @@ class DuplicateFinderTab(QWidget):
         
         progress_group.setLayout(progress_layout)
         layout.addWidget(progress_group)
+
+        # Progress signals only record the latest state; this timer paints
+        # it at most once per frame while a scan runs
+        self._pending_progress = None
+        self._pending_message = None
+        self._ui_timer = QTimer(self)
+        self._ui_timer.setInterval(16)
+        self._ui_timer.timeout.connect(self._flush_ui)
         
         layout.addStretch()
     
@@ -174,13 +200,25 @@ class DuplicateFinderTab(QWidget):
         """Add a folder to scan"""
         folder = QFileDialog.getExistingDirectory(self, "Select Folder to Scan")
         if folder:
-            self.path_list.addItem(folder)
+            self.add_folders([folder])
+
+    def add_folders(self, folders):
+        """Add several folders to the scan list in one list update"""
+        if not folders:
+            return
+        # One layout and repaint pass for the whole batch instead of one per item
+        self.path_list.setUpdatesEnabled(False)
+        self.path_list.addItems(folders)
+        self.path_list.setUpdatesEnabled(True)
+        self.selected_paths.extend(folders)
     
     def remove_folder(self):
         """Remove selected folder"""
         current_item = self.path_list.currentItem()
         if current_item:
-            self.path_list.takeItem(self.path_list.row(current_item))
+            row = self.path_list.row(current_item)
+            self.path_list.takeItem(row)
+            del self.selected_paths[row]
     
     def get_selected_file_types(self):
         """Get list of selected file types"""
@@ -200,7 +238,7 @@ class DuplicateFinderTab(QWidget):
     def start_scan(self):
         """Start the duplicate scan"""
         # Validate inputs
-        if self.path_list.count() == 0:
+        if not self.selected_paths:
             QMessageBox.warning(self, "No Paths", "Please add at least one folder to scan.")
             return
 
@@ -212,28 +250,30 @@ class DuplicateFinderTab(QWidget):
         # Clean up any existing thread before starting new scan
         self.cleanup_thread()
 
-        # Collect paths
-        paths = []
+        # Collect paths (selected_paths mirrors path_list row for row)
         include_subdirs = self.include_subdirs_check.isChecked()
-        for i in range(self.path_list.count()):
-            path = self.path_list.item(i).text()
-            paths.append((path, include_subdirs))
+        paths = [(path, include_subdirs) for path in self.selected_paths]
 
         # Create session
         similarity = self.threshold_spin.value() / 100.0
         session_name = f"Scan {len(paths)} paths"
-        self.current_session_id = self.db.create_scan_session(
-            session_name,
-            json.dumps(file_types),
-            similarity
-        )
+        # Create the session and mark it running in one transaction
+        with self.db.session_scope() as session:
+            self.current_session_id = self.db.create_scan_session(
+                session_name,
+                json.dumps(file_types),
+                similarity,
+                session=session
+            )
+            self.db.update_session_status(self.current_session_id, 'running', session)
 
-        # Update DB status
-        self.db.update_session_status(self.current_session_id, 'running')
+        # Imported here: the scanning engine pulls in OpenCV, NumPy and
+        # every detector, which would otherwise delay window startup
+        from core import DuplicateScanner
 
         # Load settings for thread count
         settings = load_app_settings()
-        thread_count = settings.get('threads', 4)
+        thread_count = settings.get('threads', DuplicateScanner.DEFAULT_THREAD_COUNT)
 
         # Create scanner
         self.scanner = DuplicateScanner(
@@ -256,6 +296,7 @@ class DuplicateFinderTab(QWidget):
         self.pause_btn.setEnabled(True)
         self.stop_btn.setEnabled(True)
         self.status_label.setText("Scanning...")
+        self._ui_timer.start()
     
     def pause_scan(self):
         """Pause the scan"""
@@ -278,18 +319,28 @@ class DuplicateFinderTab(QWidget):
                 self.db.update_session_status(self.current_session_id, 'cancelled')
     
     def update_progress(self, current, total, message):
-        """Update progress bar"""
+        """Record progress for the next UI flush"""
         # current and total are now both in 0-100 range (percentages)
-        # Just set the progress directly
-        self.progress_bar.setValue(int(current))
-        self.status_label.setText(message)
+        self._pending_progress = int(current)
+        self._pending_message = message
     
     def update_status(self, message):
-        """Update status label"""
-        self.status_label.setText(message)
+        """Record a status message for the next UI flush"""
+        self._pending_message = message
+
+    def _flush_ui(self):
+        """Apply the latest recorded progress and status, if any changed"""
+        if self._pending_progress is not None:
+            self.progress_bar.setValue(self._pending_progress)
+            self._pending_progress = None
+        if self._pending_message is not None:
+            self.status_label.setText(self._pending_message)
+            self._pending_message = None
     
     def scan_finished(self):
         """Handle scan completion"""
+        self._ui_timer.stop()
+        self._flush_ui()
         self.start_btn.setEnabled(True)
         self.pause_btn.setEnabled(False)
         self.stop_btn.setEnabled(False)
@@ -308,5 +359,6 @@ class DuplicateFinderTab(QWidget):
     def view_results(self):
         """Open results viewer"""
         if self.current_session_id:
+            from .results_viewer import ResultsViewer
             viewer = ResultsViewer(self.db, self.current_session_id, self)
             viewer.exec()
@@ -6,23 +6,23 @@ from PyQt6.QtWidgets import (
     QApplication, QMessageBox, QSplashScreen, QPushButton, QLabel
 )
 from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QPixmap, QIcon
+from PyQt6.QtGui import QPixmap, QIcon, QColor
 import sys
+import threading
 
 from database import Database
 from .duplicate_finder_tab import DuplicateFinderTab
-from .auto_sorter_tab import AutoSorterTab
-from .settings_tab import SettingsTab
 from .themes import ThemeManager
 
 
 class MainWindow(QMainWindow):
     """Main application window"""
     
-    def __init__(self):
+    def __init__(self, db: Database = None):
         super().__init__()
-        self.db = Database()
+        self.db = db if db is not None else Database()
         self.theme_manager = ThemeManager()
+        self._applied_theme = None
         self.init_ui()
         self.apply_theme()
     
@@ -42,7 +42,7 @@ class MainWindow(QMainWindow):
         header_layout.setContentsMargins(10, 5, 10, 5)
         
         title_label = QLabel('File Deduplicator & Organizer')
-        title_label.setStyleSheet('font-size: 16px; font-weight: bold;')
+        title_label.setObjectName('titleLabel')
         header_layout.addWidget(title_label)
         
         header_layout.addStretch()
@@ -58,19 +58,54 @@ class MainWindow(QMainWindow):
         self.tabs = QTabWidget()
         layout.addWidget(self.tabs)
         
-        # Add tabs
+        # Add tabs. Only the first is built now; the others get a
+        # placeholder and are built (and their modules imported) the first
+        # time they are shown
         self.duplicate_finder = DuplicateFinderTab(self.db)
-        self.auto_sorter = AutoSorterTab(self.db)
-        self.settings = SettingsTab(self.db)
+        self.auto_sorter = None
+        self.settings = None
         
         self.tabs.addTab(self.duplicate_finder, "🔍 Find Duplicates")
-        self.tabs.addTab(self.auto_sorter, "📁 Auto-Sort Files")
-        self.tabs.addTab(self.settings, "⚙️ Settings")
+        self.tabs.addTab(QWidget(), "📁 Auto-Sort Files")
+        self.tabs.addTab(QWidget(), "⚙️ Settings")
+        self._lazy_tabs = {1: self._build_auto_sorter, 2: self._build_settings}
+        self.tabs.currentChanged.connect(self._lazy_build_tab)
+
+    def _build_auto_sorter(self):
+        from .auto_sorter_tab import AutoSorterTab
+        self.auto_sorter = AutoSorterTab(self.db)
+        return self.auto_sorter
+
+    def _build_settings(self):
+        from .settings_tab import SettingsTab
+        self.settings = SettingsTab(self.db)
+        return self.settings
+
+    def _lazy_build_tab(self, index):
+        """Swap a tab's placeholder for the real widget on first activation"""
+        build = self._lazy_tabs.pop(index, None)
+        if build is None:
+            return
+        placeholder = self.tabs.widget(index)
+        label = self.tabs.tabText(index)
+        # Removing and re-inserting moves the current index around
+        self.tabs.blockSignals(True)
+        self.tabs.removeTab(index)
+        self.tabs.insertTab(index, build(), label)
+        self.tabs.setCurrentIndex(index)
+        self.tabs.blockSignals(False)
+        placeholder.deleteLater()
     
     def apply_theme(self):
         """Apply current theme to the application"""
-        stylesheet = self.theme_manager.get_theme(self.theme_manager.current_theme)
-        self.setStyleSheet(stylesheet)
+        theme = self.theme_manager.current_theme
+        # setStyleSheet re-polishes every widget, so skip it when the theme
+        # is already applied. Set on the application, one stylesheet covers
+        # this window, its tabs and every dialog opened from it
+        if theme == self._applied_theme:
+            return
+        QApplication.instance().setStyleSheet(self.theme_manager.get_theme(theme))
+        self._applied_theme = theme
     
     def toggle_theme(self):
         """Toggle between light and dark theme"""
@@ -113,9 +148,28 @@ def main():
     
     # Set application style to Breeze if available
     app.setStyle('Breeze')
+
+    # Paint a splash first, then open the database (schema and index
+    # checks touch the disk) on a worker thread while the splash stays live
+    pixmap = QPixmap(420, 160)
+    pixmap.fill(QColor('#1e1e1e'))
+    splash = QSplashScreen(pixmap)
+    splash.showMessage('Loading File Deduplicator...',
+                       Qt.AlignmentFlag.AlignCenter, QColor('#e0e0e0'))
+    splash.show()
+    app.processEvents()
+
+    opened = {}
+    loader = threading.Thread(target=lambda: opened.setdefault('db', Database()), daemon=True)
+    loader.start()
+    while loader.is_alive():
+        app.processEvents()
+        loader.join(0.02)
     
-    window = MainWindow()
+    # A failed open is retried here so its exception surfaces normally
+    window = MainWindow(opened.get('db'))
     window.show()
+    splash.finish(window)
     
     sys.exit(app.exec())
 
@@ -6,24 +6,162 @@ from PyQt6.QtWidgets import (
     QScrollArea, QWidget, QCheckBox, QGroupBox, QMessageBox,
     QFileDialog, QSplitter, QTextEdit, QComboBox, QFrame
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QSize, QTimer
+from PyQt6.QtCore import Qt, pyqtSignal, QSize, QTimer, QObject, QRunnable, QThreadPool
 from PyQt6.QtGui import QPixmap, QImage, QCursor
 from PIL import Image
 import os
+import csv
 import cv2
 import json
+import shutil
 import hashlib
+import tempfile
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from sqlalchemy import select
 
+from core.base import BaseDetector, XXHASH_AVAILABLE
 from database import Database
+from database.models import DuplicateGroup, FileEntry
+
+# Pre-scaled image previews, inside the thumbnail cache so "Clear Thumbnail
+# Cache" in Settings removes them too
+PREVIEW_CACHE_DIR = os.path.expanduser('~/.cache/deduplicator/thumbnails/previews')
+
+# Resolved once instead of searching PATH on every "Open Location" click
+XDG_OPEN = shutil.which('xdg-open') or 'xdg-open'
+
+
+def _preview_path(identity, size):
+    """Cache file for the preview of size px identified by identity"""
+    key = hashlib.blake2b(f"{identity}|{size}".encode(), digest_size=16).hexdigest()
+    return os.path.join(PREVIEW_CACHE_DIR, f"{key}.png")
+
+
+def _content_hash(path):
+    """XXH3-128 of a file the scan did not hash (see
+    DuplicateScanner.CONTENT_HASH_MAX_SIZE); None if xxhash is missing or
+    the file is unreadable"""
+    if not XXHASH_AVAILABLE:
+        return None
+    try:
+        return BaseDetector.file_hash(path, 'xxh3_128')
+    except OSError:
+        return None
+
+
+def _get_thumb(path, size=400, content_hash=None):
+    """Return (path of a cached preview at most size x size, content hash).
+
+    The cache key covers the path, size and mtime, so a hit needs only a
+    stat() and the small PNG is all that gets decoded. On a miss the file is
+    hashed and the preview stored under its content, so identical copies
+    share one preview, with the path key hard-linked to it; only if no copy
+    has been previewed yet is the image decoded (at reduced scale for JPEGs).
+    The hash is returned so the caller can record it; None on a path-key hit
+    when none was passed in.
+    """
+    stat_result = os.stat(path)
+    path_cache = _preview_path(f"{path}|{stat_result.st_size}|{stat_result.st_mtime_ns}", size)
+    if os.path.exists(path_cache):
+        return path_cache, content_hash
+
+    if content_hash is None:
+        content_hash = _content_hash(path)
+    if not content_hash:
+        cache_path = path_cache
+    else:
+        cache_path = _preview_path(f"{content_hash}|{stat_result.st_size}", size)
+        if os.path.exists(cache_path):
+            _link_preview(cache_path, path_cache)
+            return cache_path, content_hash
+
+    with Image.open(path) as img:
+        img.draft('RGB', (size, size))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        elif img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+            img = img.convert('RGB')
+        img.thumbnail((size, size), Image.Resampling.BILINEAR)
+
+        os.makedirs(PREVIEW_CACHE_DIR, exist_ok=True)
+        # Write then rename so a concurrent reader never sees a partial file.
+        # Identical copies share a cache path and may be loaded at the same
+        # time, so each writer needs its own temp file.
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=PREVIEW_CACHE_DIR)
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                img.save(tmp_file, 'PNG')
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+    if cache_path != path_cache:
+        _link_preview(cache_path, path_cache)
+    return cache_path, content_hash
+
+
+def _link_preview(cache_path, path_cache):
+    """Make the path-keyed entry point at a content-keyed preview, so the
+    next lookup for this file is a stat() again; best effort"""
+    try:
+        os.link(cache_path, path_cache)
+    except OSError:
+        pass
+
+
+class _PreviewSignals(QObject):
+    loaded = pyqtSignal(QImage, str)  # preview, content hash or ''
+
+
+class ThumbnailLoader(QRunnable):
+    """Decode and scale one image preview on the global thread pool.
+
+    Produces a QImage (safe to build off the GUI thread); the receiving
+    widget turns it into a QPixmap.
+    """
+
+    def __init__(self, file_path, size=400, content_hash=None):
+        super().__init__()
+        self.file_path = file_path
+        self.size = size
+        self.content_hash = content_hash
+        self.signals = _PreviewSignals()
+        self.setAutoDelete(True)
+
+    def run(self):
+        content_hash = None
+        try:
+            thumb_path, content_hash = _get_thumb(self.file_path, self.size, self.content_hash)
+            image = QImage(thumb_path)
+        except Exception:
+            # Formats Pillow cannot open (e.g. SVG) may still load in Qt
+            image = QImage(self.file_path)
+            if not image.isNull():
+                image = image.scaled(self.size, self.size, Qt.AspectRatioMode.KeepAspectRatio,
+                                     Qt.TransformationMode.SmoothTransformation)
+        self.signals.loaded.emit(image, content_hash or '')
 
 
 class FilePreviewWidget(QWidget):
     """Widget for previewing a file"""
+
+    content_hashed = pyqtSignal(str)  # hash computed while loading the preview
+
+    # Text previews decode at most this many bytes and show this many chars
+    TEXT_PREVIEW_BYTES = 8192
+    TEXT_PREVIEW_CHARS = 5000
     
-    def __init__(self, file_path, file_type):
+    def __init__(self, file_path, file_type, content_hash=None):
         super().__init__()
         self.file_path = file_path
         self.file_type = file_type
+        self.content_hash = content_hash
         self.init_ui()
     
     def init_ui(self):
@@ -45,19 +183,32 @@ class FilePreviewWidget(QWidget):
     def show_image_preview(self, layout):
         """Show image preview"""
         try:
-            img_label = QLabel()
-            pixmap = QPixmap(self.file_path)
-            if not pixmap.isNull():
-                # Scale to reasonable size while maintaining aspect ratio
-                scaled_pixmap = pixmap.scaled(400, 400, Qt.AspectRatioMode.KeepAspectRatio, 
-                                             Qt.TransformationMode.SmoothTransformation)
-                img_label.setPixmap(scaled_pixmap)
-                img_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-                layout.addWidget(img_label)
-            else:
-                layout.addWidget(QLabel("Could not load image"))
+            # Show a placeholder now and decode on the thread pool, so
+            # building a page of results never waits on image decoding.
+            # Loaders run in submission order, i.e. top of the list first.
+            self.img_label = QLabel("Loading preview...")
+            self.img_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.img_label.setMinimumHeight(200)
+            layout.addWidget(self.img_label)
+
+            loader = ThumbnailLoader(self.file_path, content_hash=self.content_hash)
+            # Held here so the signal object outlives the finished runnable
+            self._loader_signals = loader.signals
+            self._loader_signals.loaded.connect(self.set_image_preview)
+            QThreadPool.globalInstance().start(loader)
         except Exception as e:
             layout.addWidget(QLabel(f"Error loading image: {str(e)}"))
+
+    def set_image_preview(self, image, content_hash):
+        """Show a preview decoded by ThumbnailLoader"""
+        if content_hash and not self.content_hash:
+            self.content_hash = content_hash
+            self.content_hashed.emit(content_hash)
+        if image.isNull():
+            self.img_label.setText("Could not load image")
+            return
+        self.img_label.setMinimumHeight(0)
+        self.img_label.setPixmap(QPixmap.fromImage(image))
     
     def show_text_preview(self, layout):
         """Show text file preview"""
@@ -66,11 +217,20 @@ class FilePreviewWidget(QWidget):
             text_edit.setReadOnly(True)
             text_edit.setMaximumHeight(300)
             
-            with open(self.file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read(5000)  # First 5000 chars
-                if len(content) == 5000:
-                    content += "\n\n[Preview truncated...]"
-                text_edit.setPlainText(content)
+            # Only the head of the file is read, however large it is
+            with open(self.file_path, 'rb') as f:
+                raw = f.read(self.TEXT_PREVIEW_BYTES + 1)
+            if raw.count(b'\x00') > 16:
+                layout.addWidget(QLabel("Binary file, no text preview"))
+                return
+            truncated = len(raw) > self.TEXT_PREVIEW_BYTES
+            content = raw[:self.TEXT_PREVIEW_BYTES].decode('utf-8', errors='ignore')
+            if len(content) > self.TEXT_PREVIEW_CHARS:
+                content = content[:self.TEXT_PREVIEW_CHARS]
+                truncated = True
+            if truncated:
+                content += "\n\n[Preview truncated...]"
+            text_edit.setPlainText(content)
             
             layout.addWidget(text_edit)
         except Exception as e:
@@ -132,7 +292,29 @@ class FilePreviewWidget(QWidget):
 class DuplicateGroupWidget(QWidget):
     """Widget displaying a group of duplicate files"""
     
-    selection_changed = pyqtSignal()
+    selection_changed = pyqtSignal(int)  # change in the number of selected files
+    content_hashed = pyqtSignal(int, str)  # file entry id, content hash
+
+    # File cards and everything inside them share the card look
+    STYLE_SHEET = """
+        QWidget#fileCard, QWidget#fileCard QWidget {
+            background-color: #2d2d2d;
+            border: 1px solid #3d3d3d;
+            border-radius: 6px;
+            padding: 8px;
+        }
+        QLabel#deleteLabel {
+            color: #e74c3c;
+            font-weight: bold;
+        }
+        QLabel#pathLabel {
+            font-size: 11px;
+        }
+        QLabel#infoLabel {
+            font-size: 10px;
+            color: #888;
+        }
+    """
     
     def __init__(self, group_id, files, file_type, similarity):
         super().__init__()
@@ -141,10 +323,17 @@ class DuplicateGroupWidget(QWidget):
         self.file_type = file_type
         self.similarity = similarity
         self.file_checkboxes = []
+        # Files kept by "Keep Newest" / "Keep Largest" (first one on ties)
+        indices = range(len(files))
+        self.newest_idx = max(indices, key=lambda i: files[i]['modified'] or datetime.min, default=0)
+        self.largest_idx = max(indices, key=lambda i: files[i]['size'], default=0)
         self.init_ui()
     
     def init_ui(self):
         """Initialize the UI"""
+        # One stylesheet for the whole group, parsed once, instead of one
+        # per file card and label
+        self.setStyleSheet(self.STYLE_SHEET)
         main_layout = QVBoxLayout(self)
         main_layout.setContentsMargins(8, 8, 8, 8)
         
@@ -203,22 +392,26 @@ class DuplicateGroupWidget(QWidget):
     def create_file_widget(self, file_info):
         """Create widget for a single file"""
         widget = QWidget()
+        widget.setObjectName('fileCard')
         widget.setMaximumWidth(450)
         layout = QVBoxLayout(widget)
         layout.setContentsMargins(4, 4, 4, 4)
         
         # Checkbox for deletion
         checkbox = QCheckBox()
-        checkbox.stateChanged.connect(self.selection_changed.emit)
-        checkbox.setProperty('file_id', file_info['id'])
-        checkbox.setProperty('file_path', file_info['path'])
+        checkbox.setChecked(file_info.get('selected', False))
+        # The choice lives in the group model so it survives the row being
+        # released when it scrolls far out of view
+        checkbox.stateChanged.connect(
+            lambda state, info=file_info: self.set_file_selected(info, state == Qt.CheckState.Checked.value)
+        )
         self.file_checkboxes.append(checkbox)
         
         header_layout = QHBoxLayout()
         header_layout.addWidget(checkbox)
         
         delete_label = QLabel("Mark for deletion")
-        delete_label.setStyleSheet("color: #e74c3c; font-weight: bold;")
+        delete_label.setObjectName('deleteLabel')
         header_layout.addWidget(delete_label)
         header_layout.addStretch()
         
@@ -227,7 +420,7 @@ class DuplicateGroupWidget(QWidget):
         # File path
         path_label = QLabel(file_info['path'])
         path_label.setWordWrap(True)
-        path_label.setStyleSheet("font-size: 11px;")
+        path_label.setObjectName('pathLabel')
         layout.addWidget(path_label)
         
         # File info
@@ -235,11 +428,14 @@ class DuplicateGroupWidget(QWidget):
         modified = file_info['modified'].strftime('%Y-%m-%d %H:%M:%S') if file_info['modified'] else 'Unknown'
         
         info_label = QLabel(f"Size: {size_mb:.2f} MB | Modified: {modified}")
-        info_label.setStyleSheet("font-size: 10px; color: #888;")
+        info_label.setObjectName('infoLabel')
         layout.addWidget(info_label)
         
         # Preview
-        preview = FilePreviewWidget(file_info['path'], self.file_type)
+        preview = FilePreviewWidget(file_info['path'], self.file_type, file_info['content_hash'])
+        preview.content_hashed.connect(
+            lambda content_hash, info=file_info: self.record_content_hash(info, content_hash)
+        )
         layout.addWidget(preview)
         
         # Open location button
@@ -247,96 +443,151 @@ class DuplicateGroupWidget(QWidget):
         open_btn.clicked.connect(lambda: self.open_file_location(file_info['path']))
         layout.addWidget(open_btn)
         
-        # Style the widget
-        widget.setStyleSheet("""
-            QWidget {
-                background-color: #2d2d2d;
-                border: 1px solid #3d3d3d;
-                border-radius: 6px;
-                padding: 8px;
-            }
-        """)
-        
         return widget
     
     def open_file_location(self, file_path):
         """Open the file's location in file manager"""
-        import subprocess
         directory = os.path.dirname(file_path)
         
         try:
-            # For Linux
-            subprocess.Popen(['xdg-open', directory])
+            # For Linux; detached so the opener neither inherits our file
+            # descriptors nor writes to our terminal
+            subprocess.Popen([XDG_OPEN, directory], close_fds=True, start_new_session=True,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Could not open location: {str(e)}")
     
+    def record_content_hash(self, file_info, content_hash):
+        """Keep a hash computed by a preview in the group model and report it"""
+        file_info['content_hash'] = content_hash
+        self.content_hashed.emit(file_info['id'], content_hash)
+
+    def set_file_selected(self, file_info, selected):
+        """Record one checkbox toggle and report the change"""
+        if file_info.get('selected', False) != selected:
+            file_info['selected'] = selected
+            self.selection_changed.emit(1 if selected else -1)
+
+    def set_selection(self, selected):
+        """Check each file's box per the list of flags, reporting one
+        aggregate change instead of one per checkbox"""
+        delta = 0
+        for file_info, cb, checked in zip(self.files, self.file_checkboxes, selected):
+            if file_info.get('selected', False) != checked:
+                file_info['selected'] = checked
+                delta += 1 if checked else -1
+            cb.blockSignals(True)
+            cb.setChecked(checked)
+            cb.blockSignals(False)
+        if delta:
+            self.selection_changed.emit(delta)
+
     def select_all(self):
         """Select all files for deletion"""
-        for cb in self.file_checkboxes:
-            cb.setChecked(True)
+        self.set_selection([True] * len(self.files))
     
     def select_none(self):
         """Deselect all files"""
-        for cb in self.file_checkboxes:
-            cb.setChecked(False)
+        self.set_selection([False] * len(self.files))
     
     def keep_newest(self):
         """Select all except the newest file"""
-        if not self.files:
-            return
-        
-        # Find newest file
-        newest_idx = 0
-        newest_time = self.files[0]['modified']
-        
-        for i, f in enumerate(self.files):
-            if f['modified'] and f['modified'] > newest_time:
-                newest_time = f['modified']
-                newest_idx = i
-        
-        # Select all except newest
-        for i, cb in enumerate(self.file_checkboxes):
-            cb.setChecked(i != newest_idx)
+        if self.files:
+            self.set_selection([i != self.newest_idx for i in range(len(self.files))])
     
     def keep_largest(self):
         """Select all except the largest file"""
-        if not self.files:
-            return
-        
-        # Find largest file
-        largest_idx = 0
-        largest_size = self.files[0]['size']
-        
-        for i, f in enumerate(self.files):
-            if f['size'] > largest_size:
-                largest_size = f['size']
-                largest_idx = i
-        
-        # Select all except largest
-        for i, cb in enumerate(self.file_checkboxes):
-            cb.setChecked(i != largest_idx)
+        if self.files:
+            self.set_selection([i != self.largest_idx for i in range(len(self.files))])
     
     def get_selected_files(self):
         """Get list of files marked for deletion"""
-        selected = []
-        for cb in self.file_checkboxes:
-            if cb.isChecked():
-                selected.append({
-                    'id': cb.property('file_id'),
-                    'path': cb.property('file_path')
-                })
-        return selected
+        return selected_files(self.files)
+
+
+def selected_files(files):
+    """Id and path of each file in a group model marked for deletion"""
+    return [
+        {'id': file_info['id'], 'path': file_info['path']}
+        for file_info in files
+        if file_info.get('selected')
+    ]
+
+
+class GroupSlot(QWidget):
+    """Holds one duplicate group's row: a fixed-height placeholder while the
+    row is away from the viewport, the real DuplicateGroupWidget near it"""
+
+    # Rough height of a built row, so the scroll range is close to final
+    PLACEHOLDER_HEIGHT = 520
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self.group_widget = None
+        self._layout = QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)
+        self._placeholder = QWidget()
+        self._placeholder.setFixedHeight(self.PLACEHOLDER_HEIGHT)
+        self._layout.addWidget(self._placeholder)
+
+    def materialize(self):
+        """Build the real row in place of the placeholder"""
+        self.group_widget = DuplicateGroupWidget(
+            self.model['id'],
+            self.model['files'],
+            self.model['file_type'],
+            self.model['similarity']
+        )
+        self._layout.removeWidget(self._placeholder)
+        self._placeholder.deleteLater()
+        self._placeholder = None
+        self._layout.addWidget(self.group_widget)
+        return self.group_widget
+
+    def release(self):
+        """Swap the built row back for a placeholder of the same height"""
+        self._placeholder = QWidget()
+        self._placeholder.setFixedHeight(self.group_widget.height())
+        self._layout.removeWidget(self.group_widget)
+        self.group_widget.deleteLater()
+        self.group_widget = None
+        self._layout.addWidget(self._placeholder)
 
 
 class ResultsViewer(QDialog):
     """Dialog for viewing and managing duplicate scan results"""
+
+    # Built rows further than this many screens from the viewport are released
+    RELEASE_SCREENS = 4
+
+    # Preview hashes arriving within this window are written in one commit
+    HASH_FLUSH_DELAY_MS = 1000
+
+    FILTER_TYPES = {
+        "All": None,
+        "Images": "image",
+        "Documents": "document",
+        "Videos": "video",
+        "Archives": "archive",
+        "Code": "code"
+    }
     
     def __init__(self, db: Database, session_id: int, parent=None):
         super().__init__(parent)
         self.db = db
         self.session_id = session_id
         self.duplicate_groups = []
-        self.group_widgets = []
+        # One GroupSlot per group; built_slots holds those with a real row
+        self.group_slots = []
+        self.built_slots = []
+        self.selected_count = 0
+        # Hashes computed for previews, written back in batches
+        self.pending_hashes = {}
+        self.hash_flush_timer = QTimer(self)
+        self.hash_flush_timer.setSingleShot(True)
+        self.hash_flush_timer.setInterval(self.HASH_FLUSH_DELAY_MS)
+        self.hash_flush_timer.timeout.connect(self.flush_content_hashes)
         self.init_ui()
         self.load_results()
     
@@ -366,16 +617,22 @@ class ResultsViewer(QDialog):
         layout.addLayout(header_layout)
         
         # Scroll area for results
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.scroll = QScrollArea()
+        self.scroll.setWidgetResizable(True)
+        self.scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         
         self.results_widget = QWidget()
         self.results_layout = QVBoxLayout(self.results_widget)
         self.results_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
         
-        scroll.setWidget(self.results_widget)
-        layout.addWidget(scroll)
+        self.scroll.setWidget(self.results_widget)
+        layout.addWidget(self.scroll)
+
+        # Rows are built as they come near the viewport; building one changes
+        # the scroll range, which re-runs the check for the rows below it
+        scroll_bar = self.scroll.verticalScrollBar()
+        scroll_bar.valueChanged.connect(self.materialize_visible)
+        scroll_bar.rangeChanged.connect(self.materialize_visible)
         
         # Bottom actions
         actions_layout = QHBoxLayout()
@@ -422,51 +679,58 @@ class ResultsViewer(QDialog):
         from PyQt6.QtWidgets import QApplication
         QApplication.processEvents()
 
-        # Clear existing widgets
-        for widget in self.group_widgets:
-            widget.deleteLater()
-        self.group_widgets.clear()
+        # Clear existing rows (and any "no duplicates" label)
+        while self.results_layout.count():
+            item = self.results_layout.takeAt(0)
+            if item.widget():
+                item.widget().deleteLater()
+        self.group_slots.clear()
+        self.built_slots.clear()
 
         # Query database for duplicate groups
         session = self.db.get_session()
         
         try:
-            from database.models import DuplicateGroup, FileEntry
-            from sqlalchemy.orm import joinedload
-            # Use eager loading to avoid N+1 query pattern
-            # Sort by similarity score descending (highest confidence first)
-            groups = session.query(DuplicateGroup).options(
-                joinedload(DuplicateGroup.files)
-            ).filter_by(
-                session_id=self.session_id
+            # One joined SELECT of plain rows instead of hydrating ORM
+            # objects; highest similarity first, each group's rows together
+            stmt = select(
+                DuplicateGroup.id, DuplicateGroup.file_type, DuplicateGroup.similarity_score,
+                FileEntry.id, FileEntry.file_path, FileEntry.file_size,
+                FileEntry.modified_time, FileEntry.content_xxh128
+            ).join(
+                FileEntry, FileEntry.group_id == DuplicateGroup.id
+            ).where(
+                DuplicateGroup.session_id == self.session_id
             ).order_by(
-                DuplicateGroup.similarity_score.desc()
-            ).all()
+                DuplicateGroup.similarity_score.desc(), DuplicateGroup.id, FileEntry.id
+            )
+            rows = session.execute(stmt).all()
             
-            total_groups = len(groups)
-            total_files = 0
+            total_groups = 0
+            total_files = len(rows)
             
-            for group in groups:
-                files = []
-                for file_entry in group.files:
-                    files.append({
-                        'id': file_entry.id,
-                        'path': file_entry.file_path,
-                        'size': file_entry.file_size,
-                        'modified': file_entry.modified_time
-                    })
-                    total_files += 1
+            for (group_id, file_type, similarity), group_rows in groupby(rows, key=lambda row: row[:3]):
+                total_groups += 1
+                files = [
+                    {
+                        'id': file_id,
+                        'path': path,
+                        'size': size,
+                        'modified': modified,
+                        'content_hash': content_hash
+                    }
+                    for _, _, _, file_id, path, size, modified, content_hash in group_rows
+                ]
                 
                 if len(files) > 1:  # Only show groups with actual duplicates
-                    group_widget = DuplicateGroupWidget(
-                        group.id,
-                        files,
-                        group.file_type,
-                        group.similarity_score
-                    )
-                    group_widget.selection_changed.connect(self.update_selection_count)
-                    self.group_widgets.append(group_widget)
-                    self.results_layout.addWidget(group_widget)
+                    slot = GroupSlot({
+                        'id': group_id,
+                        'files': files,
+                        'file_type': file_type,
+                        'similarity': similarity
+                    })
+                    self.group_slots.append(slot)
+                    self.results_layout.addWidget(slot)
             
             # Update stats
             self.stats_label.setText(
@@ -483,41 +747,102 @@ class ResultsViewer(QDialog):
             session.close()
             # Restore normal cursor
             self.setCursor(QCursor(Qt.CursorShape.ArrowCursor))
+
+        self.apply_filter(self.filter_combo.currentText())
+        self.update_selection_count()
+
+    def materialize_visible(self, *args):
+        """Build the rows within one screen of the viewport and release
+        those that have scrolled RELEASE_SCREENS screens away, so the number
+        of live widgets stays bounded however long the list is"""
+        viewport_height = self.scroll.viewport().height()
+        top = self.scroll.verticalScrollBar().value() - viewport_height
+        bottom = top + 3 * viewport_height
+
+        keep_top = top - self.RELEASE_SCREENS * viewport_height
+        keep_bottom = bottom + self.RELEASE_SCREENS * viewport_height
+        kept = []
+        for slot in self.built_slots:
+            y = slot.y()
+            if slot.isHidden() or y > keep_bottom or y + slot.height() < keep_top:
+                slot.release()
+            else:
+                kept.append(slot)
+        self.built_slots = kept
+
+        for slot in self.group_slots:
+            if slot.isHidden() or slot.group_widget is not None:
+                continue
+            y = slot.y()
+            if y > bottom:
+                break
+            if y + slot.height() >= top:
+                group_widget = slot.materialize()
+                group_widget.selection_changed.connect(self.adjust_selection_count)
+                group_widget.content_hashed.connect(self.record_content_hash)
+                self.built_slots.append(slot)
     
     def apply_filter(self, filter_text):
         """Filter results by file type"""
-        filter_map = {
-            "All": None,
-            "Images": "image",
-            "Documents": "document",
-            "Videos": "video",
-            "Archives": "archive",
-            "Code": "code"
-        }
+        filter_type = self.FILTER_TYPES.get(filter_text)
         
-        filter_type = filter_map.get(filter_text)
-        
-        for widget in self.group_widgets:
-            if filter_type is None or widget.file_type == filter_type:
-                widget.show()
-            else:
-                widget.hide()
+        # One repaint and re-layout for the whole batch, and only slots whose
+        # visibility actually changes are touched
+        self.results_widget.setUpdatesEnabled(False)
+        try:
+            for slot in self.group_slots:
+                visible = filter_type is None or slot.model['file_type'] == filter_type
+                if slot.isHidden() == visible:
+                    slot.setVisible(visible)
+        finally:
+            self.results_widget.setUpdatesEnabled(True)
+        # Slot positions only settle after the layout runs
+        QTimer.singleShot(0, self.materialize_visible)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.materialize_visible()
     
     def update_selection_count(self):
-        """Update the count of selected files"""
-        total_selected = 0
-        for widget in self.group_widgets:
-            total_selected += len(widget.get_selected_files())
-        
-        self.selected_count_label.setText(f"{total_selected} files selected for deletion")
-        self.delete_btn.setEnabled(total_selected > 0)
+        """Recount the selected files across all groups"""
+        self.selected_count = 0
+        for slot in self.group_slots:
+            self.selected_count += len(selected_files(slot.model['files']))
+        self.show_selection_count()
+
+    def record_content_hash(self, entry_id, content_hash):
+        """Queue a hash computed by a preview to be written to its entry"""
+        self.pending_hashes[entry_id] = content_hash
+        self.hash_flush_timer.start()
+
+    def flush_content_hashes(self):
+        """Write queued preview hashes to the database in one transaction"""
+        self.hash_flush_timer.stop()
+        pending, self.pending_hashes = self.pending_hashes, {}
+        try:
+            self.db.set_content_hashes(pending)
+        except Exception as e:
+            print(f"Error saving content hashes: {e}")
+
+    def done(self, result):
+        self.flush_content_hashes()
+        super().done(result)
+
+    def adjust_selection_count(self, delta):
+        """Apply a change reported by one group instead of recounting"""
+        self.selected_count += delta
+        self.show_selection_count()
+
+    def show_selection_count(self):
+        self.selected_count_label.setText(f"{self.selected_count} files selected for deletion")
+        self.delete_btn.setEnabled(self.selected_count > 0)
     
     def delete_selected(self):
         """Delete files marked for deletion"""
         # Collect all selected files
         files_to_delete = []
-        for widget in self.group_widgets:
-            files_to_delete.extend(widget.get_selected_files())
+        for slot in self.group_slots:
+            files_to_delete.extend(selected_files(slot.model['files']))
         
         if not files_to_delete:
             QMessageBox.warning(self, "No Selection", "No files selected for deletion.")
@@ -534,29 +859,30 @@ class ResultsViewer(QDialog):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            deleted_count = 0
+            deleted_ids = []
             failed_files = []
-            
-            for file_info in files_to_delete:
+
+            def remove(file_info):
                 try:
-                    os.remove(file_info['path'])
-                    deleted_count += 1
-                    
-                    # Update database
-                    session = self.db.get_session()
-                    try:
-                        from database.models import FileEntry
-                        file_entry = session.query(FileEntry).filter_by(
-                            id=file_info['id']
-                        ).first()
-                        if file_entry:
-                            session.delete(file_entry)
-                            session.commit()
-                    finally:
-                        session.close()
-                        
+                    os.unlink(file_info['path'])
+                    return None
                 except Exception as e:
-                    failed_files.append(f"{file_info['path']}: {str(e)}")
+                    return f"{file_info['path']}: {str(e)}"
+
+            # Unlinks are independent and release the GIL; overlap them
+            with ThreadPoolExecutor(max_workers=min(16, (os.cpu_count() or 4) * 2)) as executor:
+                for file_info, error in zip(files_to_delete, executor.map(remove, files_to_delete)):
+                    if error is None:
+                        deleted_ids.append(file_info['id'])
+                    else:
+                        failed_files.append(error)
+            deleted_count = len(deleted_ids)
+            
+            # Update database once for all removed files
+            try:
+                self.db.delete_file_entries(deleted_ids)
+            except Exception as e:
+                print(f"Error removing deleted files from the database: {e}")
             
             # Show results
             message = f"Successfully deleted {deleted_count} files."
@@ -572,7 +898,7 @@ class ResultsViewer(QDialog):
             self.load_results()
     
     def export_results(self):
-        """Export results to a text file"""
+        """Export results to a text or CSV file"""
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             "Export Results",
@@ -582,19 +908,62 @@ class ResultsViewer(QDialog):
         
         if file_path:
             try:
-                with open(file_path, 'w') as f:
-                    f.write("Duplicate Scan Results\n")
-                    f.write("=" * 80 + "\n\n")
-                    
-                    for widget in self.group_widgets:
-                        if widget.isVisible():
-                            f.write(f"\nDuplicate Group ({widget.file_type}, {widget.similarity*100:.1f}% similar):\n")
-                            f.write("-" * 80 + "\n")
-                            for file_info in widget.files:
-                                f.write(f"  {file_info['path']}\n")
-                                f.write(f"    Size: {file_info['size'] / (1024*1024):.2f} MB\n")
-                            f.write("\n")
+                # Rows not built yet are exported from their models
+                filter_type = self.FILTER_TYPES.get(self.filter_combo.currentText())
+                groups = [
+                    slot.model for slot in self.group_slots
+                    if filter_type is None or slot.model['file_type'] == filter_type
+                ]
+                if file_path.lower().endswith('.csv'):
+                    self._write_csv(file_path, groups)
+                else:
+                    self._write_text(file_path, groups)
                 
                 QMessageBox.information(self, "Export Complete", f"Results exported to:\n{file_path}")
             except Exception as e:
                 QMessageBox.critical(self, "Export Failed", f"Failed to export results:\n{str(e)}")
+
+    @staticmethod
+    def _write_text(file_path, groups):
+        """Write the text report, formatted in memory and written in one go"""
+        parts = ["Duplicate Scan Results\n", "=" * 80 + "\n\n"]
+        for group in groups:
+            parts.append(f"\nDuplicate Group ({group['file_type']}, {group['similarity']*100:.1f}% similar):\n")
+            parts.append("-" * 80 + "\n")
+            # Byte-identical copies share a content hash. Only hashes already
+            # recorded are used: export runs on the GUI thread and must not
+            # read whole files.
+            seen_hashes = {}
+            for file_info in group['files']:
+                parts.append(f"  {file_info['path']}\n")
+                parts.append(f"    Size: {file_info['size'] / (1024*1024):.2f} MB\n")
+                content_hash = file_info['content_hash']
+                if content_hash:
+                    if content_hash in seen_hashes:
+                        parts.append(f"    Identical to: {seen_hashes[content_hash]}\n")
+                    else:
+                        seen_hashes[content_hash] = file_info['path']
+            parts.append("\n")
+
+        with open(file_path, 'w', buffering=1024 * 1024) as f:
+            f.writelines(parts)
+
+    @staticmethod
+    def _write_csv(file_path, groups):
+        """Write one CSV row per file, in the same columns as the CLI export"""
+        with open(file_path, 'w', newline='', buffering=1024 * 1024) as f:
+            writer = csv.writer(f)
+            writer.writerow(['group_id', 'file_type', 'similarity', 'file_path',
+                             'file_size_bytes', 'modified_time'])
+            writer.writerows(
+                (
+                    group['id'],
+                    group['file_type'],
+                    group['similarity'],
+                    file_info['path'],
+                    file_info['size'],
+                    file_info['modified'].isoformat() if file_info['modified'] else ''
+                )
+                for group in groups
+                for file_info in group['files']
+            )
@@ -6,14 +6,34 @@ from PyQt6.QtWidgets import (
     QPushButton, QSpinBox, QCheckBox, QFileDialog, QLineEdit,
     QMessageBox
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
 import os
 import json
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from database import Database
 from database.models import ScanSession
 
 
+class OptimizeThread(QThread):
+    """Background thread for Database.optimize"""
+    finished = pyqtSignal(str)  # error message, empty on success
+
+    def __init__(self, db: Database):
+        super().__init__()
+        self.db = db
+
+    def run(self):
+        try:
+            self.db.optimize()
+        except Exception as e:
+            self.finished.emit(str(e))
+            return
+        self.finished.emit('')
+
+
 class SettingsTab(QWidget):
     """Tab for application settings"""
     
@@ -22,6 +42,7 @@ class SettingsTab(QWidget):
         self.db = db
         self.settings_file = os.path.expanduser('~/.config/deduplicator/settings.json')
         self.settings = self.load_settings()
+        self.optimize_thread = None
         self.init_ui()
     
     def init_ui(self):
@@ -36,8 +57,8 @@ class SettingsTab(QWidget):
         thread_layout.addWidget(QLabel("Scanner threads:"))
         self.thread_spin = QSpinBox()
         self.thread_spin.setMinimum(1)
-        self.thread_spin.setMaximum(16)
-        self.thread_spin.setValue(self.settings.get('threads', 4))
+        self.thread_spin.setMaximum(64)
+        self.thread_spin.setValue(self.settings.get('threads', _default_thread_count()))
         thread_layout.addWidget(self.thread_spin)
         thread_layout.addStretch()
         perf_layout.addLayout(thread_layout)
@@ -88,9 +109,9 @@ class SettingsTab(QWidget):
         clear_btn.clicked.connect(self.clear_old_sessions)
         db_layout.addWidget(clear_btn)
         
-        vacuum_btn = QPushButton("Optimize Database")
-        vacuum_btn.clicked.connect(self.vacuum_database)
-        db_layout.addWidget(vacuum_btn)
+        self.vacuum_btn = QPushButton("Optimize Database")
+        self.vacuum_btn.clicked.connect(self.vacuum_database)
+        db_layout.addWidget(self.vacuum_btn)
         
         db_group.setLayout(db_layout)
         layout.addWidget(db_group)
@@ -141,8 +162,23 @@ class SettingsTab(QWidget):
         }
         
         try:
-            with open(self.settings_file, 'w') as f:
-                json.dump(self.settings, f, indent=2)
+            data = json.dumps(self.settings, indent=2).encode()
+            try:
+                with open(self.settings_file, 'rb') as f:
+                    unchanged = f.read() == data
+            except FileNotFoundError:
+                unchanged = False
+            if not unchanged:
+                # Write a sibling file and rename it over the old one, so a
+                # crash mid-write never leaves a truncated settings file
+                tmp_path = f"{self.settings_file}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.settings_file)
+                with _settings_lock:
+                    _settings_cache['stamp'] = None
             QMessageBox.information(self, "Settings Saved", "Settings have been saved.")
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to save settings: {str(e)}")
@@ -171,18 +207,24 @@ class SettingsTab(QWidget):
                 QMessageBox.warning(self, "Error", f"Failed to clear sessions: {str(e)}")
     
     def vacuum_database(self):
-        """Optimize database"""
-        try:
-            session = self.db.get_session()
-            session.execute("VACUUM")
-            session.close()
+        """Optimize database in the background"""
+        self.vacuum_btn.setEnabled(False)
+        self.vacuum_btn.setText("Optimizing...")
+        self.optimize_thread = OptimizeThread(self.db)
+        self.optimize_thread.finished.connect(self.optimize_finished)
+        self.optimize_thread.start()
+
+    def optimize_finished(self, error):
+        """Handle completion of the optimize thread"""
+        self.vacuum_btn.setEnabled(True)
+        self.vacuum_btn.setText("Optimize Database")
+        if error:
+            QMessageBox.warning(self, "Error", f"Failed to optimize database: {error}")
+        else:
             QMessageBox.information(self, "Optimized", "Database has been optimized.")
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to optimize database: {str(e)}")
     
     def clear_cache(self):
         """Clear thumbnail cache"""
-        import shutil
         cache_path = os.path.expanduser('~/.cache/deduplicator/thumbnails')
         
         reply = QMessageBox.question(
@@ -195,26 +237,80 @@ class SettingsTab(QWidget):
         if reply == QMessageBox.StandardButton.Yes:
             try:
                 if os.path.exists(cache_path):
-                    shutil.rmtree(cache_path)
+                    # Move the cache aside and delete it in the background,
+                    # so the dialog returns at once however many files it has
+                    doomed_path = f"{cache_path}.deleting-{uuid.uuid4().hex}"
+                    os.rename(cache_path, doomed_path)
                     os.makedirs(cache_path)
+                    threading.Thread(target=_remove_tree, args=(doomed_path,), daemon=True).start()
                 QMessageBox.information(self, "Cleared", "Thumbnail cache has been cleared.")
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"Failed to clear cache: {str(e)}")
 
 
+def _remove_tree(path: str):
+    """Delete a directory tree, overlapping the unlink calls on a thread pool"""
+    directories = []
+    files = []
+    for root, dirnames, filenames in os.walk(path, topdown=False):
+        files.extend(os.path.join(root, name) for name in filenames)
+        directories.append(root)
+
+    def unlink(file_path):
+        try:
+            os.unlink(file_path)
+        except OSError:
+            pass
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        executor.map(unlink, files)
+    # Children come before their parents in a bottom-up walk
+    for directory in directories:
+        try:
+            os.rmdir(directory)
+        except OSError as e:
+            print(f"Error removing {directory}: {e}")
+
+
+def _default_thread_count() -> int:
+    # Imported on use; the scanning engine is slow to import
+    from core import DuplicateScanner
+    return DuplicateScanner.DEFAULT_THREAD_COUNT
+
+
+# Settings as last read from disk, keyed by the file's (mtime_ns, size)
+_settings_cache = {'stamp': None, 'data': None}
+_settings_lock = threading.Lock()
+
+
 def load_app_settings() -> dict:
-    """Load application settings from file (standalone function for use by other modules)"""
+    """Load application settings from file (standalone function for use by other modules)
+
+    The parsed file is cached until its mtime or size changes, so repeated
+    calls cost one stat().
+    """
     settings_file = os.path.expanduser('~/.config/deduplicator/settings.json')
     os.makedirs(os.path.dirname(settings_file), exist_ok=True)
-    if os.path.exists(settings_file):
-        try:
-            with open(settings_file, 'r') as f:
-                return json.load(f)
-        except Exception:
-            pass
+    try:
+        stat_result = os.stat(settings_file)
+    except OSError:
+        stat_result = None
+    if stat_result is not None:
+        stamp = (stat_result.st_mtime_ns, stat_result.st_size)
+        with _settings_lock:
+            if _settings_cache['stamp'] == stamp:
+                return dict(_settings_cache['data'])
+            try:
+                with open(settings_file, 'r') as f:
+                    data = json.load(f)
+                _settings_cache['stamp'] = stamp
+                _settings_cache['data'] = data
+                return dict(data)
+            except Exception:
+                pass
     # Return defaults
     return {
-        'threads': 4,
+        'threads': _default_thread_count(),
         'cache_size_mb': 500,
         'ollama_url': 'http://localhost:11434',
         'vision_model': 'llava'
@@ -2,11 +2,112 @@
 Auto-sorting utility for organizing files into categories.
 """
 import os
+import json
+import mmap
+import errno
 import shutil
+import sqlite3
+import hashlib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Optional, Callable
 from core.base import FileScanner
 
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+
+def _iter_tree(path: str):
+    """Yield (directory, name) for every non-directory entry under path,
+    recursively.
+
+    All entries of a directory share its one path string, so a long list
+    of files does not store each directory prefix again per file. Uses
+    the type cached on each DirEntry, so no file needs its own stat().
+    Like os.walk, symlinks to directories are listed as neither files nor
+    descended into, and unreadable directories are skipped.
+    """
+    try:
+        with os.scandir(path) as entries:
+            subdirs = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif not entry.is_dir():
+                    yield path, entry.name
+    except OSError:
+        return
+    # Recurse after closing the listing, so only one directory is open at once
+    for subdir in subdirs:
+        yield from _iter_tree(subdir)
+
+
+# Numbered names tried before falling back to a random suffix
+UNIQUE_NAME_ATTEMPTS = 16
+
+
+def _reserve_unique_path(directory: str, filename: str) -> str:
+    """Reserve a free name for filename in directory and return its path.
+
+    Tries filename, then name_1, name_2, ... and, if those are all taken,
+    a random suffix, so a crowded directory costs a bounded number of
+    probes. Each name is reserved by creating an empty file with O_EXCL,
+    so concurrent moves can never pick the same destination; the move
+    then replaces the placeholder.
+    """
+    name, ext = os.path.splitext(filename)
+    candidates = [filename]
+    candidates.extend(f"{name}_{counter}{ext}" for counter in range(1, UNIQUE_NAME_ATTEMPTS))
+    while True:
+        for candidate in candidates:
+            path = os.path.join(directory, candidate)
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+                return path
+            except FileExistsError:
+                pass
+        candidates = [f"{name}_{uuid.uuid4().hex[:8]}{ext}"]
+
+
+def _move_file(source: str, destination: str):
+    """Move a file, replacing the reserved placeholder at destination.
+
+    On the same filesystem this is a single rename() syscall; only when
+    the rename fails with EXDEV does shutil.move copy the data.
+    """
+    try:
+        os.replace(source, destination)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(source, destination)
+
+
+def _move_into(source: str, directory: str) -> str:
+    """Move a file into directory under a free name and return its new path"""
+    # Handle filename conflicts
+    destination = _reserve_unique_path(directory, os.path.basename(source))
+    try:
+        _move_file(source, destination)
+    except Exception:
+        # Release the reserved name
+        if os.path.isfile(destination) and os.path.getsize(destination) == 0:
+            os.unlink(destination)
+        raise
+    return destination
+
+
+def _report_errors(errors: List[str]):
+    """Print collected error messages in one write, then clear the list"""
+    if errors:
+        print("\n".join(errors))
+        errors.clear()
+
 
 class AutoSorter:
     """Automatically sort files into categorized folders"""
@@ -19,6 +120,17 @@ class AutoSorter:
         'code': FileScanner.SUPPORTED_EXTENSIONS['code'],
         'others': set()  # Catch-all
     }
+
+    # Reverse index so categorizing a file is one dict lookup; built in
+    # reverse so the first category listing an extension wins
+    CATEGORY_BY_EXT: Dict[str, str] = {
+        ext: category
+        for category, extensions in reversed(CATEGORY_MAPPING.items())
+        for ext in extensions
+    }
+
+    # Files moved concurrently
+    MOVE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
     
     def __init__(self, source_paths: List[str], destination: str):
         self.source_paths = source_paths
@@ -29,6 +141,10 @@ class AutoSorter:
             'failed': 0,
             'skipped': 0
         }
+        # Error messages are collected by the worker threads and printed
+        # together once the run ends
+        self.errors = []
+        self.is_stopped = False
     
     def sort_files(self, progress_callback: Optional[Callable] = None,
                    status_callback: Optional[Callable] = None):
@@ -47,72 +163,97 @@ class AutoSorter:
             os.makedirs(cat_dir, exist_ok=True)
             category_dirs[category] = cat_dir
         
-        # Collect all files
+        # Collect all files, as (directory, name) pairs
         all_files = []
         for source_path in self.source_paths:
             if os.path.isfile(source_path):
-                all_files.append(source_path)
+                all_files.append(os.path.split(source_path))
             elif os.path.isdir(source_path):
-                for root, dirs, files in os.walk(source_path):
-                    for filename in files:
-                        all_files.append(os.path.join(root, filename))
+                all_files.extend(_iter_tree(source_path))
+
+        # When the destination lies inside a source tree, files a previous
+        # run already sorted sit directly in their category folder; leave
+        # them alone instead of renaming them to name_1 on every run.
+        # Directory strings are shared per listing, so each is resolved once.
+        category_real = {category: os.path.realpath(cat_dir) for category, cat_dir in category_dirs.items()}
+        real_dirs = {}
+
+        def already_sorted(file_entry):
+            directory, filename = file_entry
+            real_dir = real_dirs.get(directory)
+            if real_dir is None:
+                real_dir = real_dirs[directory] = os.path.realpath(directory)
+            return real_dir == category_real[self._category_for_name(filename)]
+
+        found_count = len(all_files)
+        all_files = [entry for entry in all_files if not already_sorted(entry)]
+        self.stats['skipped'] += found_count - len(all_files)
         
         self.stats['total'] = len(all_files)
         
         if status_callback:
             status_callback(f"Found {self.stats['total']} files to sort")
         
-        # Sort each file
-        for idx, file_path in enumerate(all_files):
-            if progress_callback:
-                progress_callback(idx + 1, self.stats['total'], file_path)
-            
-            category = self._get_file_category(file_path)
+        # Moves are I/O-bound syscalls (a rename, or a copy across devices),
+        # so overlap them on a thread pool
+        lock = threading.Lock()
+        completed = 0
+
+        def sort_one(file_entry):
+            nonlocal completed
+            if self.is_stopped:
+                with lock:
+                    self.stats['skipped'] += 1
+                return
+
+            directory, filename = file_entry
+            file_path = os.path.join(directory, filename)
+            category = self._category_for_name(filename)
             dest_dir = category_dirs[category]
             
+            error = None
             try:
-                # Handle filename conflicts
-                dest_path = self._get_unique_path(dest_dir, os.path.basename(file_path))
-                shutil.move(file_path, dest_path)
-                self.stats['moved'] += 1
+                _move_into(file_path, dest_dir)
+                result = 'moved'
             except Exception as e:
-                print(f"Error moving {file_path}: {e}")
-                self.stats['failed'] += 1
+                error = f"Error moving {file_path}: {e}"
+                result = 'failed'
+
+            with lock:
+                if error:
+                    self.errors.append(error)
+                self.stats[result] += 1
+                completed += 1
+                if progress_callback:
+                    progress_callback(completed, self.stats['total'], file_path)
+
+        with ThreadPoolExecutor(max_workers=self.MOVE_WORKERS) as executor:
+            # Consume the iterator so worker exceptions are not swallowed
+            list(executor.map(sort_one, all_files))
+        _report_errors(self.errors)
         
         if status_callback:
             status_callback(f"Sorting complete! Moved: {self.stats['moved']}, "
                           f"Failed: {self.stats['failed']}")
         
         return self.stats
-    
+
+    def stop(self):
+        """Stop sorting once the moves already in progress finish"""
+        self.is_stopped = True
+
     def _get_file_category(self, file_path: str) -> str:
         """Determine which category a file belongs to"""
-        ext = os.path.splitext(file_path)[1].lower()
-        
-        for category, extensions in self.CATEGORY_MAPPING.items():
-            if category == 'others':
-                continue
-            if ext in extensions:
-                return category
-        
-        return 'others'
+        return self._category_for_name(os.path.basename(file_path))
+
+    def _category_for_name(self, filename: str) -> str:
+        """Category of a bare file name; the extension is sliced off directly,
+        with os.path.splitext's rule that leading dots do not start one"""
+        stem = filename.lstrip('.')
+        dot = stem.rfind('.')
+        ext = stem[dot:].lower() if dot >= 0 else ''
+        return self.CATEGORY_BY_EXT.get(ext, 'others')
     
-    def _get_unique_path(self, directory: str, filename: str) -> str:
-        """Get a unique file path, adding numbers if file exists"""
-        base_path = os.path.join(directory, filename)
-        
-        if not os.path.exists(base_path):
-            return base_path
-        
-        name, ext = os.path.splitext(filename)
-        counter = 1
-        
-        while True:
-            new_name = f"{name}_{counter}{ext}"
-            new_path = os.path.join(directory, new_name)
-            if not os.path.exists(new_path):
-                return new_path
-            counter += 1
 
 
 class MLImageCategorizer:
@@ -128,20 +269,53 @@ class MLImageCategorizer:
         'others'
     ]
     
+    # Categorization requests kept in flight at once, unless the local
+    # Ollama's OLLAMA_NUM_PARALLEL says how many it serves concurrently
+    CATEGORIZE_WORKERS = 4
+    # Cached categories written per commit
+    CACHE_COMMIT_BATCH = 128
+    # Seconds allowed per request. Ollama answers only once inference is
+    # done, so a request queued behind the others in flight is given their
+    # time as well.
+    REQUEST_TIMEOUT = 30
+    
     def __init__(self, ollama_model: str = 'llava'):
         self.model = ollama_model
+        self.workers = self._parallel_requests()
         self.cache_dir = os.path.expanduser('~/.cache/deduplicator/ml_cache')
         os.makedirs(self.cache_dir, exist_ok=True)
+        # One keep-alive connection to Ollama for the whole folder
+        self._session = None
+        self.is_stopped = False
+        # Per-image errors, printed together at the end of each folder
+        self.errors = []
+        # Categories of images already classified, keyed by content hash and
+        # model, so re-runs skip the model call; shared by the worker threads
+        self._cache_db = None
+        self._cache_lock = threading.Lock()
+        self._cache_pending = 0
     
-    def categorize_image(self, image_path: str) -> str:
-        """Categorize a single image using Ollama vision model"""
+    def categorize_image(self, image_path: str) -> Optional[str]:
+        """Categorize a single image using Ollama vision model.
+
+        Returns None if the model could not be asked, so the image is left
+        where it is rather than filed under 'others'.
+        """
         try:
-            import requests
             import base64
             
-            # Read and encode image
+            # Map the file instead of reading it: the hash and the base64
+            # encoder both consume the pages directly
             with open(image_path, 'rb') as f:
-                image_data = base64.b64encode(f.read()).decode('utf-8')
+                if os.fstat(f.fileno()).st_size == 0:
+                    return 'others'
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    content_hash = self._content_hash(mm)
+                    cached = self._cache_lookup(content_hash)
+                    if cached is not None:
+                        return cached
+                    # Encode image
+                    image_data = base64.b64encode(mm)
             
             # Prepare prompt
             prompt = (
@@ -151,16 +325,22 @@ class MLImageCategorizer:
                 "Respond with ONLY the category name, nothing else."
             )
             
+            if self._session is None:
+                self._session = self._new_session()
+
+            # Build the JSON body around the encoded bytes (base64 needs no
+            # escaping) instead of decoding them to str for json.dumps,
+            # which would copy the image twice more
+            head = json.dumps({'model': self.model, 'prompt': prompt, 'stream': False})
+            body = b''.join((head[:-1].encode(), b', "images": ["', image_data, b'"]}'))
+            del image_data
+
             # Call Ollama API
-            response = requests.post(
+            response = self._session.post(
                 'http://localhost:11434/api/generate',
-                json={
-                    'model': self.model,
-                    'prompt': prompt,
-                    'images': [image_data],
-                    'stream': False
-                },
-                timeout=30
+                data=body,
+                headers={'Content-Type': 'application/json'},
+                timeout=self.REQUEST_TIMEOUT * self.workers
             )
             
             if response.status_code == 200:
@@ -169,12 +349,15 @@ class MLImageCategorizer:
                 
                 # Validate category
                 if category in self.CATEGORIES:
+                    self._cache_store(content_hash, category)
                     return category
-            
-            return 'others'
+                return 'others'
+
+            self.errors.append(f"Error categorizing {image_path}: HTTP {response.status_code}")
+            return None
         except Exception as e:
-            print(f"Error categorizing {image_path}: {e}")
-            return 'others'
+            self.errors.append(f"Error categorizing {image_path}: {e}")
+            return None
     
     def categorize_folder(self, folder_path: str, 
                          progress_callback: Optional[Callable] = None):
@@ -190,18 +373,110 @@ class MLImageCategorizer:
         
         total = len(images)
         categorized = {}
+        if self._session is None:
+            self._session = self._new_session()
+
+        stopped = object()
+
+        def categorize(image_path):
+            if self.is_stopped:
+                return stopped
+            return self.categorize_image(image_path)
+
+        # Keep several requests in flight so encoding and uploading the next
+        # images overlaps the model working on the current one; results are
+        # consumed in order
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for idx, (image_path, category) in enumerate(zip(images, executor.map(categorize, images))):
+                if category is stopped:
+                    break
+
+                if progress_callback:
+                    progress_callback(idx + 1, total, image_path)
+
+                if category is None:
+                    continue
+                if category not in categorized:
+                    categorized[category] = []
+                categorized[category].append(image_path)
         
-        for idx, image_path in enumerate(images):
-            if progress_callback:
-                progress_callback(idx + 1, total, image_path)
-            
-            category = self.categorize_image(image_path)
-            
-            if category not in categorized:
-                categorized[category] = []
-            categorized[category].append(image_path)
-        
+        self.flush_cache()
+        _report_errors(self.errors)
         return categorized
+
+    @staticmethod
+    def _content_hash(data) -> str:
+        if XXHASH_AVAILABLE:
+            return xxhash.xxh3_128_hexdigest(data)
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def _cache_connection(self):
+        """Open the category cache on first use (call with _cache_lock held)"""
+        if self._cache_db is None:
+            self._cache_db = sqlite3.connect(
+                os.path.join(self.cache_dir, 'categories.db'), check_same_thread=False
+            )
+            self._cache_db.execute(
+                'CREATE TABLE IF NOT EXISTS categories ('
+                'hash TEXT, model TEXT, category TEXT, PRIMARY KEY (hash, model))'
+            )
+        return self._cache_db
+
+    def _cache_lookup(self, content_hash: str) -> Optional[str]:
+        try:
+            with self._cache_lock:
+                row = self._cache_connection().execute(
+                    'SELECT category FROM categories WHERE hash = ? AND model = ?',
+                    (content_hash, self.model)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading category cache: {e}")
+            return None
+        return row[0] if row else None
+
+    def _cache_store(self, content_hash: str, category: str):
+        try:
+            with self._cache_lock:
+                connection = self._cache_connection()
+                connection.execute(
+                    'INSERT OR REPLACE INTO categories VALUES (?, ?, ?)',
+                    (content_hash, self.model, category)
+                )
+                # Committed in batches rather than once per image
+                self._cache_pending += 1
+                if self._cache_pending >= self.CACHE_COMMIT_BATCH:
+                    connection.commit()
+                    self._cache_pending = 0
+        except sqlite3.Error as e:
+            print(f"Error writing category cache: {e}")
+
+    def flush_cache(self):
+        """Commit categories stored since the last batch"""
+        with self._cache_lock:
+            if self._cache_db is not None and self._cache_pending:
+                self._cache_db.commit()
+                self._cache_pending = 0
+
+    @classmethod
+    def _parallel_requests(cls) -> int:
+        """Requests to keep in flight: one more than the server runs at once,
+        so the next upload overlaps inference, when OLLAMA_NUM_PARALLEL is set"""
+        try:
+            return max(1, int(os.environ['OLLAMA_NUM_PARALLEL'])) + 1
+        except (KeyError, ValueError):
+            return cls.CATEGORIZE_WORKERS
+
+    def _new_session(self):
+        """HTTP session keeping one connection per concurrent request alive"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=self.workers))
+        return session
+
+    def stop(self):
+        """Stop categorizing once the requests already in flight return"""
+        self.is_stopped = True
     
     def sort_by_category(self, categorized: Dict[str, List[str]], 
                         destination: str):
@@ -212,17 +487,7 @@ class MLImageCategorizer:
             
             for image_path in image_paths:
                 try:
-                    filename = os.path.basename(image_path)
-                    dest_path = os.path.join(cat_dir, filename)
-                    
-                    # Handle duplicates
-                    if os.path.exists(dest_path):
-                        name, ext = os.path.splitext(filename)
-                        counter = 1
-                        while os.path.exists(dest_path):
-                            dest_path = os.path.join(cat_dir, f"{name}_{counter}{ext}")
-                            counter += 1
-                    
-                    shutil.move(image_path, dest_path)
+                    _move_into(image_path, cat_dir)
                 except Exception as e:
-                    print(f"Error moving {image_path}: {e}")
+                    self.errors.append(f"Error moving {image_path}: {e}")
+        _report_errors(self.errors)